@@ -1,18 +1,30 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, g, send_file, stream_with_context
 import json
-from datetime import datetime
-import threading
 import time
 import sys
 import os
+import uuid
 from dotenv import load_dotenv
 from seo_generator import generate_seo_suggestions
 import google.generativeai as genai
 from seo_research import main
-from blog_generator import generate_blog_with_gemini
+from blog_generator import generate_blog_with_gemini, generate_blog_and_seo
+from serp_cache import get_serp_cache
+from meta_cache import get_meta_cache
+from context_cache import get_context_cache
+from model_provider import get_model
+from seo_cache import get_seo_cache
+from page_cache import get_page_cache
+from jobs import JobManager, QueueFullError
+from bulk_research import bulk_research, read_keywords
+from storage import get_storage
+from artifacts import new_artifact_id, new_timestamp, safe_name, write_json_artifact
+from metrics import HTTP_DURATION, registry as metrics_registry, stats_lines
+from log_config import correlation_id, reset_correlation_id, set_correlation_id, setup_logging
 
 
 load_dotenv()
+setup_logging()
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
@@ -24,16 +36,52 @@ app.secret_key = FLASK_KEY
 
 #gemini configuration
 genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel("gemini-2.0-flash")
+model = get_model()  # MODEL_BACKEND=stub runs offline
 
 
-# Global variables to track research progress
-research_status = {
-    'running': False,
-    'progress': '',
-    'completed': False,
-    'results': []
-}
+# Jobs live in this process's memory: serve with a single threaded worker (see gunicorn.conf.py)
+# Background research jobs
+RESEARCH_WORKERS = int(os.getenv('RESEARCH_WORKERS', '4'))  # research jobs running at once
+RESEARCH_QUEUE_LIMIT = int(os.getenv('RESEARCH_QUEUE_LIMIT', '20'))  # queued + running jobs allowed
+research_jobs = JobManager('research', max_workers=RESEARCH_WORKERS, max_pending=RESEARCH_QUEUE_LIMIT)
+
+# Background blog generation jobs
+BLOG_WORKERS = int(os.getenv('BLOG_WORKERS', '4'))  # Gemini generations running at once
+BLOG_QUEUE_LIMIT = int(os.getenv('BLOG_QUEUE_LIMIT', '50'))  # queued + running generations allowed
+blog_jobs = JobManager('blog', max_workers=BLOG_WORKERS, max_pending=BLOG_QUEUE_LIMIT)
+BLOG_PIPELINE = os.getenv('BLOG_PIPELINE', '1') == '1'  # overlap SEO generation with blog streaming
+
+# Background bulk keyword research jobs (each one already runs many queries in parallel)
+BULK_WORKERS = int(os.getenv('BULK_WORKERS', '1'))
+BULK_QUEUE_LIMIT = int(os.getenv('BULK_QUEUE_LIMIT', '5'))
+BULK_MAX_KEYWORDS = int(os.getenv('BULK_MAX_KEYWORDS', '1000'))
+bulk_jobs = JobManager('bulk', max_workers=BULK_WORKERS, max_pending=BULK_QUEUE_LIMIT)
+
+# Request metrics; cache counters are read from the caches on each scrape
+metrics_registry.add_collector(lambda: cache_metric_lines())
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    # Log lines for this request carry its ID; clients may pass their own
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:12]
+    g.correlation_token = set_correlation_id(g.request_id)
+
+@app.after_request
+def record_request_duration(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_DURATION.labels(endpoint, request.method, response.status_code).observe(time.perf_counter() - start)
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.teardown_request
+def clear_correlation_id(exc):
+    token = g.pop('correlation_token', None)
+    if token is not None:
+        reset_correlation_id(token)
 
 @app.route('/')
 def index():
@@ -42,12 +90,7 @@ def index():
 
 @app.route('/start_research', methods=['POST'])
 def start_research():
-    """Start SEO research in background."""
-    global research_status
-    
-    if research_status['running']:
-        return jsonify({'error': 'Research already running'}), 400
-    
+    """Start SEO research in background and return its job ID."""
     data = request.get_json()
     keyword = data.get('keyword', '').strip()
     num_results = int(data.get('num_results', 10))
@@ -56,119 +99,345 @@ def start_research():
     if not keyword:
         return jsonify({'error': 'Keyword is required'}), 400
     
-    # Reset status
-    research_status = {
-        'running': True,
-        'progress': 'Starting research...',
-        'completed': False,
-        'results': [],
-        'keyword': keyword
-    }
+    try:
+        job = research_jobs.submit(
+            run_research, keyword, num_results, search_type,
+            info={'keyword': keyword}
+        )
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
     
-    # Start research in background thread
-    thread = threading.Thread(
-        target=run_research, 
-        args=(keyword, num_results,search_type)
+    return jsonify({'message': 'Research started', 'status': job.status, 'job_id': job.id}), 202
+
+def run_research(job, keyword, num_results, search_type):
+    """Run SEO research for one job in a worker thread."""
+    job.progress = f'Researching keyword: {keyword}...'
+    job.publish('progress', {'progress': job.progress})
+    
+    def on_progress(event, data):
+        if event == 'serp':
+            job.progress = f'Found {data["total"]} URLs. Extracting meta data...'
+        elif event == 'url':
+            job.progress = f'Extracted {data["completed"]}/{data["total"]} pages...'
+        job.publish('progress', dict(data, event=event, progress=job.progress))
+    
+    results = main(keyword, num_results, search_type, save_to_file=False,
+                   cancel_event=job.cancel_event, progress_callback=on_progress)
+    if job.cancelled:
+        return results
+    job.progress = f'Completed! Found {len(results)} results.'
+    
+    # Save results to session file
+    timestamp = new_timestamp()
+    _, filename = write_json_artifact('static/results', f'results_{safe_name(keyword)}', {
+        'keyword': keyword,
+        'timestamp': timestamp,
+        'results': results
+    }, artifact_id=new_artifact_id(timestamp))
+        
+    job.info['filename'] = filename
+    job.info['run_id'] = get_storage().save_research_run(
+        keyword, results, search_type, num_results, filename=filename
     )
-    thread.daemon = True
-    thread.start()
+    return results
+
+@app.route('/research_status/<job_id>')
+def get_research_status(job_id):
+    """Get the status of one research job (without its results)."""
+    job = research_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown research job'}), 404
+    return jsonify(job.to_dict())
+
+def job_event_stream(job):
+    """Relay a job's events as a Server-Sent Events response."""
+    # Resume after the last event the browser saw when it reconnects
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    start = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+    
+    # Streamed bodies run after the request hooks have reset the correlation ID
+    request_id = g.get('request_id', '-')
+    
+    def stream():
+        with correlation_id(request_id):
+            for event in job.iter_events(start):
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
     
-    return jsonify({'message': 'Research started', 'status': 'running'})
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-def run_research(keyword, num_results, search_type):
-    """Run SEO research in background thread."""
-    global research_status
+@app.route('/research_events/<job_id>')
+def research_events(job_id):
+    """
+    Stream a research job's progress as Server-Sent Events.
+    Sends one "progress" event per stage/URL and a final "done" event with the results.
+    """
+    job = research_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown research job'}), 404
+    
+    return job_event_stream(job)
+
+@app.route('/cancel_research/<job_id>', methods=['POST'])
+def cancel_research(job_id):
+    """Cancel a queued or running research job."""
+    if research_jobs.get(job_id) is None:
+        return jsonify({'error': 'Unknown research job'}), 404
+    cancelled = research_jobs.cancel(job_id)
+    return jsonify({'job_id': job_id, 'cancelled': cancelled})
+
+@app.route('/start_bulk_research', methods=['POST'])
+def start_bulk_research():
+    """
+    Start bulk research for a list of keywords and return its job ID.
+    "keywords" may be a list or newline-separated text.
+    """
+    data = request.get_json()
+    keywords = data.get('keywords', [])
+    if isinstance(keywords, str):
+        keywords = keywords.splitlines()
+    keywords = read_keywords(keywords)
+    num_results = int(data.get('num_results', 10))
+    search_type = data.get('search_type', 'competitor')
+    
+    if not keywords:
+        return jsonify({'error': 'At least one keyword is required'}), 400
+    if len(keywords) > BULK_MAX_KEYWORDS:
+        return jsonify({'error': f'At most {BULK_MAX_KEYWORDS} keywords per bulk run'}), 400
     
     try:
-        research_status['progress'] = f'Researching keyword: {keyword}...'
-        results = main(keyword, num_results, search_type)
-        research_status['results'] = results
-        research_status['completed'] = True
-        research_status['progress'] = f'Completed! Found {len(results)} results.'
-        
-        # Save results to session file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'results_{keyword.replace(" ", "_")}_{timestamp}.json'
-        
-        with open(f'static/results/{filename}', 'w') as f:
-            json.dump({
-                'keyword': keyword,
-                'timestamp': timestamp,
-                'results': results
-            }, f, indent=2)
-            
-        research_status['filename'] = filename
-        
-    except Exception as e:
-        research_status['progress'] = f'Error: {str(e)}'
-        research_status['results'] = []
-        research_status['completed'] = True
+        job = bulk_jobs.submit(
+            run_bulk_research, keywords, num_results, search_type,
+            info={'keyword_count': len(keywords)}
+        )
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
+    
+    return jsonify({'message': 'Bulk research started', 'status': job.status, 'job_id': job.id}), 202
+
+def run_bulk_research(job, keywords, num_results, search_type):
+    """Run bulk research for one job, streaming rows to static/results/bulk_<job_id>.jsonl."""
+    filename = f'bulk_{job.id}.jsonl'
+    job.info['filename'] = filename
+    job.progress = f'Researching {len(keywords)} keywords...'
+    job.publish('progress', {'progress': job.progress})
+    
+    serp_done = [0]
     
-    research_status['running'] = False
+    def on_progress(event, data):
+        if event == 'serp':
+            serp_done[0] += 1
+            job.progress = f'Searched {serp_done[0]}/{len(keywords)} keywords...'
+        elif event == 'row':
+            job.progress = f'Searched {serp_done[0]}/{len(keywords)} keywords, {data["rows"]} rows written...'
+        job.publish('progress', dict(data, event=event, progress=job.progress))
+    
+    os.makedirs('static/results', exist_ok=True)
+    with open(f'static/results/{filename}', 'w', encoding='utf-8') as f:
+        summary = bulk_research(keywords, f, num_results, search_type,
+                                cancel_event=job.cancel_event, progress_callback=on_progress)
+    job.progress = f'Completed! Wrote {summary["rows"]} rows for {len(keywords)} keywords.'
+    return summary
+
+@app.route('/bulk_status/<job_id>')
+def get_bulk_status(job_id):
+    """Get the status of one bulk research job."""
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown bulk research job'}), 404
+    return jsonify(job.to_dict(include_result=job.finished))
+
+@app.route('/bulk_events/<job_id>')
+def bulk_events(job_id):
+    """Stream a bulk research job's progress as Server-Sent Events."""
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown bulk research job'}), 404
+    return job_event_stream(job)
 
-@app.route('/research_status')
-def get_research_status():
-    """Get current research status."""
-    return jsonify(research_status)
+@app.route('/bulk_results/<job_id>')
+def get_bulk_results(job_id):
+    """Download the JSONL rows of a bulk research job (rows written so far while it runs)."""
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown bulk research job'}), 404
+    filename = job.info.get('filename')  # set once the job starts running
+    path = f'static/results/{filename}'
+    if filename is None or not os.path.exists(path):
+        return jsonify(job.to_dict()), 202
+    return send_file(os.path.abspath(path), mimetype='application/x-ndjson',
+                     as_attachment=True, download_name=filename, max_age=0)
 
-@app.route('/results')
-def show_results():
-    """Show research results page."""
-    if not research_status.get('completed'):
+@app.route('/cancel_bulk_research/<job_id>', methods=['POST'])
+def cancel_bulk_research(job_id):
+    """Cancel a queued or running bulk research job."""
+    if bulk_jobs.get(job_id) is None:
+        return jsonify({'error': 'Unknown bulk research job'}), 404
+    cancelled = bulk_jobs.cancel(job_id)
+    return jsonify({'job_id': job_id, 'cancelled': cancelled})
+
+def all_caches():
+    return {
+        'serp': get_serp_cache(),
+        'meta': get_meta_cache(),
+        'context': get_context_cache(),
+        'seo': get_seo_cache(),
+        'pages': get_page_cache()
+    }
+
+def all_cache_stats():
+    return {name: cache.stats() for name, cache in all_caches().items()}
+
+def cache_metric_lines():
+    caches = all_caches()
+    counters = set().union(*(cache.COUNTERS for cache in caches.values()))
+    return stats_lines('cache', 'cache', {name: cache.stats() for name, cache in caches.items()}, counters)
+
+@app.route('/cache_stats')
+def cache_stats():
+    """Get hit/miss counters for the research, prompt and page caches."""
+    return jsonify(all_cache_stats())
+
+@app.route('/metrics')
+def metrics():
+    """Stage latency histograms, outcome counters, in-flight gauges and cache stats in Prometheus text format."""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/meta/invalidate', methods=['POST'])
+def invalidate_meta_cache():
+    """Drop a single URL from the meta extraction cache."""
+    url = (request.get_json() or {}).get('url', '').strip()
+    if not url:
+        return jsonify({'error': 'URL is required'}), 400
+    
+    removed = get_meta_cache().invalidate(url)
+    return jsonify({'url': url, 'invalidated': removed})
+
+@app.route('/results/<job_id>')
+def show_results(job_id):
+    """Show research results page for one job."""
+    job = research_jobs.get(job_id)
+    if job is None:
+        return "Research job not found", 404
+    if not job.finished:
         return render_template('waiting.html')
     
     return render_template('results.html', 
-                         keyword=research_status.get('keyword', ''),
-                         results=research_status.get('results', []))
+                         keyword=job.info.get('keyword', ''),
+                         results=job.result or [])
 
 @app.route('/generate_blog', methods=['POST'])
 def generate_blog():
-    """Generate blog using Gemini API."""
+    """Queue blog generation with Gemini and return its job ID."""
+    data = request.get_json()
+    selected_result = data.get('selected_result')
+    
+    if not selected_result:
+        return jsonify({'error': 'Missing selected result or API key'}), 400
+    
     try:
-        data = request.get_json()
-        selected_result = data.get('selected_result')
+        job = blog_jobs.submit(
+            run_blog_generation, selected_result,
+            info={'keyword': selected_result.get('keyword', '')}
+        )
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
+    
+    return jsonify({'message': 'Blog generation started', 'status': job.status, 'job_id': job.id}), 202
 
-        
-        if not selected_result:
-            return jsonify({'error': 'Missing selected result or API key'}), 400
-        
-        # Generate blog using Gemini
+def run_blog_generation(job, selected_result):
+    """Generate a blog and its SEO suggestions for one job in a worker thread."""
+    job.progress = 'Generating blog content...'
+    job.publish('progress', {'progress': job.progress})
+    
+    if BLOG_PIPELINE:
+        # SEO suggestions start while the blog is still streaming; chunks are
+        # relayed to /blog_events listeners as they arrive
+        blog_content, seo_data, timings = generate_blog_and_seo(
+            selected_result, model,
+            on_chunk=lambda text: job.publish('chunk', {'text': text})
+        )
+    else:
+        start = time.perf_counter()
         blog_content = generate_blog_with_gemini(selected_result, model)
-        # Generate SEO suggestions
-        seo_data= generate_seo_suggestions(blog_content, model)
-        
-        # Save generated blog
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'blog_{timestamp}.json'
-        
-        os.makedirs('static/blogs', exist_ok=True)
-        with open(f'static/blogs/{filename}', 'w') as f:
-            json.dump({
-                'source_result': selected_result,
-                'blog_content': blog_content,
-                'generated_at': timestamp,
-                'seo_data': seo_data
-            }, f, indent=2)
-        
-        return jsonify({
-            'success': True,
-            'blog_content': blog_content,
-            'filename': filename
-        })
+        timings = {'blog_done': round(time.perf_counter() - start, 3)}
         
-    except Exception as e:
-        return jsonify({'error': f'Blog generation failed: {str(e)}'}), 500
+        job.progress = 'Generating SEO suggestions...'
+        job.publish('progress', {'progress': job.progress})
+        seo_data = generate_seo_suggestions(blog_content, model)
+        timings['seo_done'] = round(time.perf_counter() - start, 3)
+    job.info['timings'] = timings
+    
+    # Save generated blog
+    timestamp = new_timestamp()
+    _, filename = write_json_artifact('static/blogs', 'blog', {
+        'source_result': selected_result,
+        'blog_content': blog_content,
+        'generated_at': timestamp,
+        'seo_data': seo_data
+    }, artifact_id=new_artifact_id(timestamp))
+    
+    job.info['filename'] = filename
+    job.info['blog_id'] = get_storage().save_blog(
+        selected_result, blog_content, seo_data, generated_at=timestamp, filename=filename
+    )
+    job.progress = 'Blog generated!'
+    return {
+        'success': True,
+        'blog_content': blog_content,
+        'filename': filename,
+        'blog_id': job.info['blog_id']
+    }
+
+@app.route('/blog_status/<job_id>')
+def get_blog_status(job_id):
+    """Get the status of one blog generation job (without the blog content)."""
+    job = blog_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown blog job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/blog_events/<job_id>')
+def blog_events(job_id):
+    """
+    Stream a blog generation job as Server-Sent Events.
+    Sends "progress" events, one "chunk" event per piece of generated text
+    (pipeline mode) and a final "done" event once the blog has been saved.
+    """
+    job = blog_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown blog job'}), 404
+    return job_event_stream(job)
+
+@app.route('/blog_result/<job_id>')
+def get_blog_result(job_id):
+    """Get the generated blog for a finished job."""
+    job = blog_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown blog job'}), 404
+    if not job.finished:
+        return jsonify(job.to_dict()), 202
+    if job.status != 'completed':
+        return jsonify({'error': f'Blog generation failed: {job.error or job.status}'}), 500
+    return jsonify(job.result)
     
 @app.route("/generate_seo", methods=["POST"])
 def generate_seo():
-    """Generate additional SEO suggestions for existing blog content."""
+    """
+    Generate additional SEO suggestions for existing blog content.
+    Cached suggestions are returned unless "force_fresh" is true.
+    """
     try:
         blog_content = request.json.get("content", "")
+        force_fresh = bool(request.json.get("force_fresh", False))
         
         if not blog_content:
             return jsonify({"error": "No content provided"}), 400
             
-        seo_data = generate_seo_suggestions(blog_content, model, num_options=3)
+        seo_data = generate_seo_suggestions(blog_content, model, num_options=3, force_fresh=force_fresh)
         return jsonify({"seo_data": seo_data})
         
     except Exception as e:
@@ -176,13 +445,75 @@ def generate_seo():
 
 @app.route('/blog/<filename>')
 def view_blog(filename):
-    """View generated blog."""
-    try:
-        with open(f'static/blogs/{filename}', 'r') as f:
-            blog_data = json.load(f)
+    """View generated blog, served from the rendered page cache."""
+    storage = get_storage()
+    path = f'static/blogs/{filename}'
+    version = storage.get_blog_version(filename)
+    if version is not None:
+        key = ('blog', filename) + version
+        load = lambda: storage.get_blog_by_filename(filename)
+    else:
+        # Blog files that were never imported into storage
+        try:
+            key = ('blog_file', filename, os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            return "Blog not found", 404
+
+        def load():
+            with open(path, 'r') as f:
+                return json.load(f)
+
+    def render():
+        blog_data = load()
+        if blog_data is None:
+            raise FileNotFoundError(filename)
         return render_template('blog.html', blog_data=blog_data)
-    except FileNotFoundError:
+
+    page_cache = get_page_cache()
+    try:
+        page = page_cache.get_or_render(key, render)
+    except FileNotFoundError:  # deleted since its version was read
         return "Blog not found", 404
+    return page_cache.respond(page, request)
+
+@app.route('/api/research_runs')
+def list_research_runs():
+    """Paginated research runs, newest first. Query: page, per_page, keyword."""
+    return jsonify(get_storage().list_research_runs(
+        request.args.get('page', 1), request.args.get('per_page', 20), request.args.get('keyword')
+    ))
+
+@app.route('/api/research_runs/<run_id>')
+def get_research_run(run_id):
+    """One stored research run with its results."""
+    run = get_storage().get_research_run(run_id)
+    if run is None:
+        return jsonify({'error': 'Unknown research run'}), 404
+    return jsonify(run)
+
+@app.route('/api/research_results')
+def find_research_results():
+    """Every stored ranking of one URL. Query: url."""
+    url = request.args.get('url', '').strip()
+    if not url:
+        return jsonify({'error': 'url is required'}), 400
+    return jsonify({'url': url, 'results': get_storage().find_results_by_url(url)})
+
+@app.route('/api/blogs')
+def list_blogs():
+    """Paginated blogs without their content, newest first. Query: page, per_page, keyword, url."""
+    return jsonify(get_storage().list_blogs(
+        request.args.get('page', 1), request.args.get('per_page', 20),
+        request.args.get('keyword'), request.args.get('url')
+    ))
+
+@app.route('/api/blogs/<blog_id>')
+def get_blog(blog_id):
+    """One stored blog with its content and SEO suggestions."""
+    blog = get_storage().get_blog(blog_id)
+    if blog is None:
+        return jsonify({'error': 'Unknown blog'}), 404
+    return jsonify(blog)
 
 if __name__ == '__main__':
     os.makedirs('static/results', exist_ok=True)
@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Optional, Tuple
+from dotenv import load_dotenv
+from metrics import timed
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
+load_dotenv()
+
+# --- Config ---
+ARTIFACT_JSON_ENCODER = os.getenv("ARTIFACT_JSON_ENCODER", "orjson")  # "orjson" or "json"
+ARTIFACT_FSYNC = os.getenv("ARTIFACT_FSYNC", "1") == "1"  # flush file contents to disk before committing
+
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# mkstemp creates files as 0600; artifacts get the mode open() would give them.
+# Read once at import: changing the umask to read it is not thread-safe.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def new_timestamp() -> str:
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+def new_artifact_id(timestamp: Optional[str] = None) -> str:
+    """A sortable, collision-free artifact ID: the local timestamp plus a random suffix."""
+    return f"{timestamp or new_timestamp()}_{uuid.uuid4().hex[:12]}"
+
+def safe_name(text: str, max_length: int = 60) -> str:
+    """Turn free text (such as a keyword) into a filename component."""
+    name = re.sub(r"[^\w-]+", "_", text.strip()).strip("_")
+    return name[:max_length] or "untitled"
+
+def dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON: compact by default, with orjson when it is installed."""
+    if orjson is not None and ARTIFACT_JSON_ENCODER == "orjson":
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+@timed("file_write")
+def write_atomic(path: str, payload: bytes, fsync: bool = ARTIFACT_FSYNC):
+    """
+    Write `payload` to `path` so readers see either the old file or the
+    complete new one: the bytes go to a temp file in the same directory
+    which then replaces the target with os.replace.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".part")
+    try:
+        os.chmod(tmp_path, FILE_MODE)
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_json_atomic(path: str, data: Any, indent: bool = False):
+    write_atomic(path, dumps(data, indent=indent))
+
+def write_json_artifact(directory: str, prefix: str, data: Any,
+                        artifact_id: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Atomically write `data` as <directory>/<prefix>_<artifact_id>.json.
+    Returns (artifact_id, filename).
+    """
+    artifact_id = artifact_id or new_artifact_id()
+    filename = f"{prefix}_{artifact_id}.json"
+    write_json_atomic(os.path.join(directory, filename), data)
+    return artifact_id, filename
+
+
+# --- Testing Functions ---
+def stress_test_artifact_writes(num_artifacts: int = 5000, num_workers: int = 32,
+                                num_rewrites: int = 2000, directory: Optional[str] = None) -> bool:
+    """
+    Write thousands of artifacts from many threads and check that none collide
+    or are left truncated. Also rewrites one shared file from all workers while
+    readers parse it continuously; with atomic replaces they never see a
+    partial document.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="artifact_stress_")
+    payload = {"blog_content": "<p>" + "x" * 4000 + "</p>", "seo_data": "<h4>Option 1</h4>"}
+
+    print(f"Stress testing artifact writes: {num_artifacts} artifacts, {num_workers} workers, "
+          f"encoder {'orjson' if orjson is not None and ARTIFACT_JSON_ENCODER == 'orjson' else 'json'}")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        written = list(executor.map(
+            lambda i: write_json_artifact(directory, "blog", dict(payload, index=i))[1],
+            range(num_artifacts),
+        ))
+    elapsed = time.perf_counter() - start
+
+    unique_ok = len(set(written)) == num_artifacts
+    on_disk = [name for name in os.listdir(directory) if name.startswith("blog_")]
+    parse_errors = 0
+    for name in on_disk:
+        try:
+            with open(os.path.join(directory, name), "rb") as f:
+                json.loads(f.read())
+        except ValueError:
+            parse_errors += 1
+    files_ok = len(on_disk) == num_artifacts and parse_errors == 0
+
+    # Many writers replacing one file while readers keep parsing it
+    shared = os.path.join(directory, "shared.json")
+    write_json_atomic(shared, dict(payload, index=-1))
+    stop = threading.Event()
+    read_errors = []
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with open(shared, "rb") as f:
+                    json.loads(f.read())
+            except ValueError as e:
+                read_errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        list(executor.map(lambda i: write_json_atomic(shared, dict(payload, index=i)), range(num_rewrites)))
+    stop.set()
+    for thread in readers:
+        thread.join()
+    shared_ok = not read_errors
+
+    leftovers = [name for name in os.listdir(directory) if name.startswith(".tmp-")]
+
+    print(f"Wrote {num_artifacts} artifacts in {elapsed:.2f}s ({num_artifacts / elapsed:.0f}/s)")
+    print(f"Unique filenames: {'✓ PASS' if unique_ok else '✗ FAIL'}")
+    print(f"All files complete and parseable: {'✓ PASS' if files_ok else '✗ FAIL'} ({parse_errors} errors)")
+    print(f"Readers never saw a partial shared file: {'✓ PASS' if shared_ok else '✗ FAIL'} ({len(read_errors)} errors)")
+    print(f"No temp files left behind: {'✓ PASS' if not leftovers else '✗ FAIL'}")
+    return unique_ok and files_ok and shared_ok and not leftovers
+
+if __name__ == "__main__":
+    stress_test_artifact_writes()
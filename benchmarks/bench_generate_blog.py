@@ -0,0 +1,121 @@
+"""
+End-to-end throughput of /generate_blog under concurrent load, offline.
+
+Runs the Flask app on a local port with MODEL_BACKEND=stub, so every model
+call goes to model_provider.StubProvider with the configured latency,
+streaming chunks and quota-error rate. Each client posts /generate_blog and
+follows the job on /blog_events until its "done" event. Reports throughput,
+time to first chunk and end-to-end latency percentiles. Generated files,
+caches and logs go to a temporary directory.
+
+Usage:
+    python benchmarks/bench_generate_blog.py [--requests 40] [--concurrency 8]
+        [--blog-workers 4] [--latency 0.5] [--chunk-delay 0.02]
+        [--quota-error-rate 0] [--sequential]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_client(session, base_url, index):
+    """Generate one blog and follow its events. Returns (ok, first_chunk_s, total_s)."""
+    selected_result = {
+        'keyword': f'benchmark keyword {index}',
+        'url': f'https://example.com/article-{index}',
+        'title': f'Benchmark Article {index}',
+        'description': 'Synthetic research result for load testing.',
+    }
+    start = time.perf_counter()
+    response = session.post(f"{base_url}/generate_blog", json={'selected_result': selected_result})
+    if response.status_code != 202:
+        return False, None, time.perf_counter() - start
+    job_id = response.json()['job_id']
+
+    first_chunk = None
+    event_type = None
+    with session.get(f"{base_url}/blog_events/{job_id}", stream=True) as events:
+        for line in events.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event_type = line[len("event: "):]
+                if event_type == "chunk" and first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+            elif line.startswith("data: ") and event_type == "done":
+                data = json.loads(line[len("data: "):])
+                result = data.get('result') or {}
+                ok = data['status'] == 'completed' and not result.get('blog_content', '').startswith('Error')
+                return ok, first_chunk, time.perf_counter() - start
+    return False, first_chunk, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8, help="clients in flight")
+    parser.add_argument("--blog-workers", type=int, default=4, help="BLOG_WORKERS for the app")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub seconds before the first chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="stub seconds between chunks")
+    parser.add_argument("--quota-error-rate", type=float, default=0.0)
+    parser.add_argument("--sequential", action="store_true", help="disable the blog/SEO pipeline")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_generate_blog_")
+    os.environ.update({
+        'MODEL_BACKEND': 'stub',
+        'STUB_LATENCY': str(args.latency),
+        'STUB_CHUNK_DELAY': str(args.chunk_delay),
+        'STUB_QUOTA_ERROR_RATE': str(args.quota_error_rate),
+        'BLOG_WORKERS': str(args.blog_workers),
+        'BLOG_QUEUE_LIMIT': str(max(args.requests, 1)),
+        'BLOG_PIPELINE': '0' if args.sequential else '1',
+        'SEO_CACHE_PATH': os.path.join(workdir, 'seo_cache.db'),
+        'CONSULTADD_STATE_PATH': os.path.join(workdir, 'consultadd_state.db'),
+    })
+    import app as blog_app
+    from http_client import create_session
+    from werkzeug.serving import make_server
+
+    # Blogs, logs and caches are written relative to the working directory
+    os.chdir(workdir)
+    server = make_server("127.0.0.1", 0, blog_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    session = create_session()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda i: run_client(session, base_url, i), range(args.requests)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    completed = [total for ok, _, total in results if ok]
+    first_chunks = [first for ok, first, _ in results if ok and first is not None]
+    print(f"{args.requests} blogs, {args.concurrency} clients, BLOG_WORKERS={args.blog_workers}, "
+          f"{'sequential' if args.sequential else 'pipeline'} mode, stub latency {args.latency}s")
+    print(f"  completed        : {len(completed)}/{args.requests}")
+    print(f"  wall time        : {elapsed:8.2f} s")
+    print(f"  throughput       : {len(completed) / elapsed:8.2f} blogs/s")
+    if first_chunks:
+        print(f"  first chunk p50  : {statistics.median(first_chunks):8.2f} s")
+    if completed:
+        print(f"  latency p50      : {percentile(completed, 50):8.2f} s")
+        print(f"  latency p95      : {percentile(completed, 95):8.2f} s")
+        print(f"  latency max      : {max(completed):8.2f} s")
+    print(f"  stub calls       : {blog_app.model.calls} ({blog_app.model.quota_errors} quota errors)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare meta parser backends on the saved HTML fixtures.
+
+Reports throughput and peak memory for each backend, both when parsing the
+whole document and in streaming mode (chunked feed that stops once the head
+fields are known, as extract_meta does).
+
+Usage:
+    python benchmarks/bench_parsers.py [--repeat 200] [--fixtures benchmarks/fixtures]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meta_parser import available_backends, create_parser
+
+CHUNK_SIZE = 16 * 1024
+
+
+def load_fixtures(directory):
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            fixtures[os.path.basename(path)] = f.read()
+    return fixtures
+
+def parse(backend, html, streaming):
+    parser = create_parser(backend)
+    if streaming:
+        for i in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[i:i + CHUNK_SIZE])
+            if parser.done:
+                break
+    else:
+        parser.feed(html)
+    parser.close()
+    return parser.meta()
+
+def run(backend, fixtures, repeat, streaming):
+    """Return (pages/sec, MB/sec, peak KiB) for one backend over all fixtures."""
+    total_bytes = sum(len(html.encode("utf-8")) for html in fixtures.values())
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in fixtures.values():
+            parse(backend, html, streaming)
+    elapsed = time.perf_counter() - start
+
+    # Peak memory is measured separately so tracemalloc does not skew timings
+    tracemalloc.start()
+    for html in fixtures.values():
+        parse(backend, html, streaming)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    pages = repeat * len(fixtures)
+    return pages / elapsed, (total_bytes * repeat) / elapsed / 1e6, peak / 1024
+
+def check_agreement(backends, fixtures):
+    """Print fixtures where backends disagree on (title, description)."""
+    for name, html in fixtures.items():
+        results = {backend: parse(backend, html, streaming=False) for backend in backends}
+        if len(set(results.values())) > 1:
+            print(f"  ! {name}: backends disagree")
+            for backend, meta in results.items():
+                print(f"      {backend:<11} {meta}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No .html fixtures found in {args.fixtures}")
+        return
+
+    backends = available_backends()
+    print(f"Fixtures: {len(fixtures)} files, repeat={args.repeat}, backends: {', '.join(backends)}")
+    check_agreement(backends, fixtures)
+
+    print(f"\n{'backend':<11} {'mode':<9} {'pages/s':>10} {'MB/s':>8} {'peak KiB':>10}")
+    print("-" * 52)
+    for backend in backends:
+        for streaming in (False, True):
+            pages_per_sec, mb_per_sec, peak_kib = run(backend, fixtures, args.repeat, streaming)
+            mode = "stream" if streaming else "full"
+            print(f"{backend:<11} {mode:<9} {pages_per_sec:>10.1f} {mb_per_sec:>8.2f} {peak_kib:>10.1f}")
+
+if __name__ == "__main__":
+    main()
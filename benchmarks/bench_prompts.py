@@ -0,0 +1,80 @@
+"""
+Measure the per-call cost of building blog prompts.
+
+Compares rebuilding the full prompt text on every call (str.format over the
+raw prompt source, title guidelines included, plus concatenating the
+competitor lists) against blog_generator.get_blog_prompt_parts, which fills
+templates compiled once at import. Also reports how much of a prompt the
+per-request part is when the static system instruction is served from the
+context cache. No model calls are made.
+
+Usage:
+    python benchmarks/bench_prompts.py [--iterations 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import blog_generator
+
+FIELDS = {
+    'keyword': 'custom ai for small business',
+    'url': 'https://example.com/custom-ai',
+    'title': 'Custom AI Solutions for Small Businesses',
+    'description': 'How small businesses adopt tailored AI tools.',
+}
+
+
+def rebuild_per_call(include_consultadd):
+    competitors = ""
+    if include_consultadd:
+        pool = (blog_generator.MAJOR_COMPETITORS + blog_generator.CONSULTING_COMPETITORS
+                + blog_generator.TECH_COMPETITORS)
+        selected = random.sample(pool, 2)
+        competitors = f"{selected[0]} and {selected[1]}"
+        source = blog_generator._CONSULTADD_PROMPT_SOURCE
+    else:
+        source = blog_generator._STANDARD_PROMPT_SOURCE
+    return source.format(title_diversity_section=blog_generator.TITLE_DIVERSITY_SECTION,
+                         competitors=competitors, **FIELDS)
+
+def precompiled(include_consultadd):
+    return blog_generator.get_blog_prompt_parts(include_consultadd, **FIELDS)
+
+def time_it(fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i % 2 == 0)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Both paths must produce the same prompt
+    random.seed(1)
+    expected = rebuild_per_call(True)
+    random.seed(1)
+    assert precompiled(True).text == expected
+
+    before = time_it(rebuild_per_call, args.iterations)
+    after = time_it(precompiled, args.iterations)
+
+    print(f"Prompt build cost over {args.iterations} calls (alternating Consultadd/standard):")
+    print(f"  rebuild per call   : {before:8.2f} us")
+    print(f"  precompiled        : {after:8.2f} us")
+    print(f"  speedup            : {before / after:8.2f}x")
+
+    prompt = precompiled(True)
+    print("Characters per Consultadd prompt:")
+    print(f"  full prompt        : {len(prompt.text):8d}")
+    print(f"  cached prefix      : {len(prompt.system_instruction):8d}")
+    print(f"  sent per request   : {len(prompt.request):8d}")
+
+if __name__ == "__main__":
+    main()
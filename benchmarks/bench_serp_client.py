@@ -0,0 +1,58 @@
+"""
+Measure the per-query client overhead of the Custom Search integration.
+
+Compares building a fresh client with googleapiclient.discovery.build() for
+every query (the old behaviour) against the cached per-thread client from
+serp_crawl.get_search_service(). Only request construction is timed; no
+network calls are made.
+
+Usage:
+    python benchmarks/bench_serp_client.py [--iterations 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from googleapiclient.discovery import build
+
+import serp_crawl
+
+
+def per_query_build(query):
+    service = build("customsearch", "v1", developerKey="bench-key")
+    return service.cse().list(q=query, cx="bench-cx", num=10)
+
+def cached_client(query):
+    service = serp_crawl.get_search_service()
+    return service.cse().list(q=query, cx="bench-cx", num=10)
+
+def time_it(fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(f"query {i}")
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    serp_crawl.GOOGLE_SERP = serp_crawl.GOOGLE_SERP or "bench-key"
+
+    # Warm up imports and the first cached build
+    per_query_build("warmup")
+    cached_client("warmup")
+
+    before = time_it(per_query_build, args.iterations)
+    after = time_it(cached_client, args.iterations)
+
+    print(f"Per-query client overhead over {args.iterations} queries:")
+    print(f"  build() per query : {before:8.3f} ms")
+    print(f"  cached client     : {after:8.3f} ms")
+    print(f"  speedup           : {before / after:8.1f}x")
+
+if __name__ == "__main__":
+    main()
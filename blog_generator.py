@@ -1,85 +1,211 @@
 import google.generativeai as genai
 import time
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, List, NamedTuple, Optional, Tuple
 import os
 import csv
+import logging
+import random
+import string
+import tempfile
+import threading
+from dotenv import load_dotenv
+from seo_generator import SEO_CONTENT_CHARS, generate_seo_suggestions
+from rate_limit import GeminiRateLimiter, call_with_retries, estimate_tokens
+from consultadd_allocator import ConsultaddAllocator
+from shared import Lazy
+from model_provider import MODEL_BACKEND, get_model
+from context_cache import get_context_cache
+from metrics import timed
+from log_config import in_current_context, setup_logging
 
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Characters of blog text generate_seo_suggestions looks at
+SEO_PREFIX_CHARS = SEO_CONTENT_CHARS
+BLOG_MAX_OUTPUT_TOKENS = 4000
+
+# Parallel batch generation
+BATCH_CONCURRENCY = int(os.getenv("BLOG_BATCH_CONCURRENCY", "4"))  # Gemini requests in flight
+
+# Runs SEO suggestion calls alongside a streaming blog generation
+_seo_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SEO_PIPELINE_WORKERS", "4")),
+                                   thread_name_prefix="seo-pipeline")
+
+def blog_generation_config():
+    return genai.types.GenerationConfig(
+        temperature=0.7,
+        top_p=0.8,
+        top_k=40,
+        max_output_tokens=BLOG_MAX_OUTPUT_TOKENS,
+    )
+
+def prepare_blog_prompt(selected_result: Dict[Any, Any],
+                        include_consultadd: Optional[bool] = None) -> Tuple["BlogPrompt", str, bool, Optional[int]]:
+    """
+    Build the blog prompt for a research result.
+    Returns (prompt, keyword, include_consultadd, blog_index).
+    The Consultadd decision is taken from the distribution logic unless given,
+    in which case blog_index is None.
+    """
+    # Extract information from selected result
+    url = selected_result.get('url', '')
+    title = selected_result.get('title', '')
+    description = selected_result.get('description', '')
+    keyword = selected_result.get('keyword', '')
+    
+    # Determine if we should include Consultadd
+    blog_index = None
+    if include_consultadd is None:
+        include_consultadd, blog_index = allocate_consultadd()
+    
+    # Create comprehensive prompt for blog generation
+    prompt = get_blog_prompt_parts(include_consultadd, keyword, url, title, description)
+    return prompt, keyword, include_consultadd, blog_index
 
 def generate_blog_with_gemini(selected_result: Dict[Any, Any], model) -> str:
     """Generate a comprehensive blog post using Gemini API based on selected research result."""
 
     try:
+        prompt, keyword, include_consultadd, blog_index = prepare_blog_prompt(selected_result)
         
-        # Extract information from selected result
-        url = selected_result.get('url', '')
-        title = selected_result.get('title', '')
-        description = selected_result.get('description', '')
-        keyword = selected_result.get('keyword', '')
-        
-        # Determine if we should include Consultadd
-        include_consultadd = should_include_consultadd()
-        
-        # Create comprehensive prompt for blog generation
-        prompt = get_blog_prompt(include_consultadd, keyword, url, title, description)
-        
-        print(f"Generating blog content for: {keyword}")
-        print("This may take 30-60 seconds...")
+        logger.info("Generating blog content for '%s'", keyword)
         
         # Generate content using Gemini
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                top_p=0.8,
-                top_k=40,
-                max_output_tokens=4000,
-            )
-        )
+        blog_content = generate_blog_text(prompt, model)
         
-        if response.text:
-            print("Blog generated successfully!")
-            # Log the decision
-            log_decision(blog_counter, keyword, include_consultadd)
-            return response.text
-        else:
-            raise Exception("No content generated by Gemini")
+        logger.info("Blog generated for '%s'", keyword)
+        # Log the decision
+        log_decision(blog_index, keyword, include_consultadd)
+        return blog_content
             
     except Exception as e:
         error_msg = f"Error generating blog with Gemini: {str(e)}"
-        print(f"{error_msg}")
+        logger.error(error_msg)
         return error_msg
 
-def get_competitor_context(num_competitors: int = 2) -> str:
+def bind_prompt(model, prompt: "BlogPrompt") -> Tuple[Any, Any]:
     """
-    Generate a list of competitors to mention alongside Consultadd for educational context.
+    (model to call, contents) for a blog prompt. Providers bind it themselves;
+    plain genai models and other stand-ins go through the context cache directly.
+    """
+    bind_prefix = getattr(model, "bind_prefix", None)
+    if bind_prefix is not None:
+        return bind_prefix(prompt.system_instruction, prompt.request, prompt.text)
+    return get_context_cache().bind(model, prompt.system_instruction, prompt.request, prompt.text)
+
+@timed("gemini_generate")
+def generate_blog_text(prompt: "BlogPrompt", model) -> str:
+    """Run one Gemini call for a prepared blog prompt. Raises on API errors or empty output."""
+    # When the static instructions are served from the context cache only the research data is sent
+    target, contents = bind_prompt(model, prompt)
+    response = target.generate_content(
+        contents,
+        generation_config=blog_generation_config()
+    )
     
-    Args:
-        num_competitors (int): Number of competitors to include (default: 2)
-        
-    Returns:
-        str: Formatted competitor list
+    if response.text:
+        return response.text
+    raise Exception("No content generated by Gemini")
+
+def chunk_text(chunk) -> str:
+    """Text of a streamed response chunk ('' for chunks without text parts)."""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+@timed("gemini_generate")
+def stream_blog_with_gemini(selected_result: Dict[Any, Any], model) -> Iterator[str]:
+    """
+    Yield blog text chunks from Gemini as they arrive.
+    Raises on API errors or if nothing was generated.
     """
-    import random
+    prompt, keyword, include_consultadd, blog_index = prepare_blog_prompt(selected_result)
     
-    # Mix competitors from different categories for variety
-    all_competitors = MAJOR_COMPETITORS + CONSULTING_COMPETITORS + TECH_COMPETITORS
+    logger.info("Streaming blog content for '%s'", keyword)
     
-    # Randomly select competitors but ensure variety
-    selected = random.sample(all_competitors, min(num_competitors, len(all_competitors)))
+    target, contents = bind_prompt(model, prompt)
+    response = target.generate_content(
+        contents,
+        generation_config=blog_generation_config(),
+        stream=True
+    )
     
-    if len(selected) == 1:
-        return selected[0]
-    elif len(selected) == 2:
-        return f"{selected[0]} and {selected[1]}"
-    else:
-        return f"{', '.join(selected[:-1])}, and {selected[-1]}"
+    generated = False
+    for chunk in response:
+        text = chunk_text(chunk)
+        if text:
+            generated = True
+            yield text
+    
+    if not generated:
+        raise Exception("No content generated by Gemini")
+    
+    logger.info("Blog generated for '%s'", keyword)
+    log_decision(blog_index, keyword, include_consultadd)
+
+def generate_blog_and_seo(selected_result: Dict[Any, Any], model, num_options: int = 3,
+                          on_chunk: Optional[Callable[[str], None]] = None) -> Tuple[str, str, Dict[str, float]]:
+    """
+    Generate a blog and its SEO suggestions with the two model calls overlapped.
 
-def get_blog_prompt(include_consultadd, keyword, url, title, description):
-    # Get competitor context for educational framing
-    competitors = get_competitor_context(2) if include_consultadd else ""
+    generate_seo_suggestions only reads the first SEO_PREFIX_CHARS characters,
+    so it is started as soon as the streamed blog reaches that length instead
+    of after the whole blog. `on_chunk(text)` is called with each blog chunk as
+    it arrives. Returns (blog_content, seo_data, timings) where timings are
+    seconds since the start of the call.
+    """
+    start = time.perf_counter()
+    elapsed = lambda: round(time.perf_counter() - start, 3)
+    timings = {}
+    parts = []
+    length = 0
+    seo_future = None
     
-    # Add title diversity guidelines
-    title_diversity_section = """
+    try:
+        for text in stream_blog_with_gemini(selected_result, model):
+            if not parts:
+                timings['first_chunk'] = elapsed()
+            parts.append(text)
+            length += len(text)
+            if on_chunk is not None:
+                on_chunk(text)
+            if seo_future is None and length >= SEO_PREFIX_CHARS:
+                timings['seo_started'] = elapsed()
+                seo_future = _seo_executor.submit(in_current_context(generate_seo_suggestions), "".join(parts), model, num_options)
+        blog_content = "".join(parts)
+    except Exception as e:
+        blog_content = f"Error generating blog with Gemini: {str(e)}"
+        logger.error(blog_content)
+    timings['blog_done'] = elapsed()
+    
+    if seo_future is None:
+        # Short blog (or failure): nothing to overlap with
+        timings['seo_started'] = elapsed()
+        seo_data = generate_seo_suggestions(blog_content, model, num_options)
+    else:
+        seo_data = seo_future.result()
+    timings['seo_done'] = elapsed()
+    
+    # Time both calls were in flight together (one saved model round trip at best)
+    timings['overlap'] = round(max(0.0, timings['blog_done'] - timings['seo_started']), 3)
+    logger.info("Pipeline timings (s): first chunk %s, SEO started %s, blog done %s, SEO done %s, overlap %s",
+                timings.get('first_chunk', '-'), timings['seo_started'], timings['blog_done'],
+                timings['seo_done'], timings['overlap'])
+    
+    return blog_content, seo_data, timings
+
+# --- Prompt Templates ---
+# The instructions are fixed; only the research fields and competitor names
+# change between calls. Templates are compiled once at import (with the
+# title guidelines already inlined). For Gemini context caching each variant
+# is also split into a static system instruction, which refers to the
+# research fields by name, and a short per-request RESEARCH DATA block; that
+# split is only sent when the instruction is actually served from the cache.
+TITLE_DIVERSITY_SECTION = """
     TITLE CREATION GUIDELINES:
     - AVOID overused words like "Unlock", "Transform", "Revolutionize", "Ultimate", "Complete Guide"
     - AVOID generic patterns like "The Power of...", "Everything You Need to Know About..."
@@ -97,9 +223,7 @@ def get_blog_prompt(include_consultadd, keyword, url, title, description):
     - TEST different title styles: avoid using the same format repeatedly
     """
 
-    
-    if include_consultadd:
-        return f"""
+_CONSULTADD_PROMPT_SOURCE = """
             You are an expert content creator tasked with generating humanised, engaging blog content for Consultadd,
             a custom AI solutions company focused on tailored AI technologies.
             Your goal is to produce original, value-driven, and reader-focused blogs that feel like they are written by a thoughtful human expert, not an AI.
@@ -225,8 +349,8 @@ def get_blog_prompt(include_consultadd, keyword, url, title, description):
             - Do NOT include <!DOCTYPE>, <html>, <head>, or <body>.
             - Do NOT include Source URL or Domain in blog content.
             """
-    else:
-        return f"""
+
+_STANDARD_PROMPT_SOURCE = """
             You are an expert content creator tasked with generating humanised, engaging blog content.
             Your goal is to produce original, value-driven, and reader-focused blogs that feel like they are written by a thoughtful human expert, not an AI.
             RESEARCH DATA:
@@ -317,6 +441,120 @@ def get_blog_prompt(include_consultadd, keyword, url, title, description):
             - Do NOT include Source URL or Domain in blog content.
             """
 
+class PromptTemplate:
+    """
+    A prompt split once into its literal text and {field} slots.
+
+    render() copies the pre-split segments and drops the field values into
+    their slots, so each call costs one join instead of re-scanning the
+    whole prompt text the way str.format does.
+    """
+
+    def __init__(self, source: str, **static_fields: str):
+        segments = []
+        slots = []
+        for literal, field, _, _ in string.Formatter().parse(source):
+            segments.append(literal)
+            if field is None:
+                continue
+            if field in static_fields:
+                segments.append(static_fields[field])
+            else:
+                slots.append((len(segments), field))
+                segments.append("")
+        self.source = source
+        self.fields = tuple(dict.fromkeys(field for _, field in slots))
+        self._segments = tuple(segments)
+        self._slots = tuple(slots)
+
+    def render(self, **fields: str) -> str:
+        parts = list(self._segments)
+        for index, field in self._slots:
+            parts[index] = fields[field]
+        return "".join(parts)
+
+CONSULTADD_PROMPT_TEMPLATE = PromptTemplate(_CONSULTADD_PROMPT_SOURCE, title_diversity_section=TITLE_DIVERSITY_SECTION)
+STANDARD_PROMPT_TEMPLATE = PromptTemplate(_STANDARD_PROMPT_SOURCE, title_diversity_section=TITLE_DIVERSITY_SECTION)
+
+# The per-request part of both prompt sources
+_RESEARCH_DATA_BLOCK = """            RESEARCH DATA:
+            - Target Keyword: {keyword}
+            - Source URL: {url}
+            - Page Title: {title}
+            - Page Description: {description}
+"""
+
+# How the system instructions refer to the per-request fields
+FIELD_REFERENCES = {
+    'keyword': "[Target Keyword]",
+    'url': "[Source URL]",
+    'title': "[Page Title]",
+    'description': "[Page Description]",
+    'competitors': "[Competitors]",
+}
+
+_FIELD_REFERENCE_NOTE = """
+            Bracketed references such as [Target Keyword], [Page Title] and [Competitors]
+            stand for the values given in the RESEARCH DATA of each request.
+"""
+
+def _system_instruction(source: str) -> str:
+    """The prompt source without its RESEARCH DATA block, fields replaced by references."""
+    return _FIELD_REFERENCE_NOTE + PromptTemplate(
+        source.replace(_RESEARCH_DATA_BLOCK, ""), title_diversity_section=TITLE_DIVERSITY_SECTION, **FIELD_REFERENCES
+    ).render()
+
+CONSULTADD_SYSTEM_INSTRUCTION = _system_instruction(_CONSULTADD_PROMPT_SOURCE)
+STANDARD_SYSTEM_INSTRUCTION = _system_instruction(_STANDARD_PROMPT_SOURCE)
+
+CONSULTADD_REQUEST_TEMPLATE = PromptTemplate(_RESEARCH_DATA_BLOCK + """            - Competitors: {competitors}
+""")
+STANDARD_REQUEST_TEMPLATE = PromptTemplate(_RESEARCH_DATA_BLOCK)
+
+class BlogPrompt(NamedTuple):
+    """
+    A blog prompt: the whole text with the research data inline, and the same
+    prompt split into a static prefix and per-request suffix for context caching.
+    """
+    text: str
+    system_instruction: str
+    request: str
+
+def get_competitor_context(num_competitors: int = 2) -> str:
+    """
+    Generate a list of competitors to mention alongside Consultadd for educational context.
+    
+    Args:
+        num_competitors (int): Number of competitors to include (default: 2)
+        
+    Returns:
+        str: Formatted competitor list
+    """
+    # Randomly select competitors from the mixed pool but ensure variety
+    selected = random.sample(COMPETITOR_POOL, min(num_competitors, len(COMPETITOR_POOL)))
+    
+    if len(selected) == 1:
+        return selected[0]
+    elif len(selected) == 2:
+        return f"{selected[0]} and {selected[1]}"
+    else:
+        return f"{', '.join(selected[:-1])}, and {selected[-1]}"
+
+def get_blog_prompt(include_consultadd, keyword, url, title, description) -> str:
+    """The full prompt as one string, with the research data inline."""
+    return get_blog_prompt_parts(include_consultadd, keyword, url, title, description).text
+
+def get_blog_prompt_parts(include_consultadd, keyword, url, title, description) -> BlogPrompt:
+    """The prompt as one string and split into its cacheable system instruction and per-request part."""
+    fields = {'keyword': keyword, 'url': url, 'title': title, 'description': description}
+    if include_consultadd:
+        # Get competitor context for educational framing
+        fields['competitors'] = get_competitor_context(2)
+        return BlogPrompt(CONSULTADD_PROMPT_TEMPLATE.render(**fields), CONSULTADD_SYSTEM_INSTRUCTION,
+                          CONSULTADD_REQUEST_TEMPLATE.render(**fields))
+    return BlogPrompt(STANDARD_PROMPT_TEMPLATE.render(**fields), STANDARD_SYSTEM_INSTRUCTION,
+                      STANDARD_REQUEST_TEMPLATE.render(**fields))
+
 # --- Config ---
 CONSULTADD_RATIO = 1  # blogs with Consultadd per batch
 TOTAL_IN_BATCH = 2   # total blogs per batch before reset
@@ -359,11 +597,45 @@ TECH_COMPETITORS = [
     "SoundHoundAI"
 ]
 
+# Mix competitors from different categories for variety
+COMPETITOR_POOL = tuple(MAJOR_COMPETITORS + CONSULTING_COMPETITORS + TECH_COMPETITORS)
+
 # --- State ---
-blog_counter = 0
-consultadd_injected = 0
+_allocator = Lazy(lambda: ConsultaddAllocator(CONSULTADD_RATIO, TOTAL_IN_BATCH))
+_log_lock = threading.Lock()  # batch workers log decisions concurrently
+
+def get_consultadd_allocator() -> ConsultaddAllocator:
+    """
+    Return the Consultadd allocator, creating it on first use. Its counters
+    live in SQLite so every thread and worker process shares one distribution.
+    """
+    return _allocator.get()
 
 # --- Distribution Logic ---
+def allocate_consultadd() -> Tuple[bool, int]:
+    """
+    Atomically take the next slot in the Consultadd distribution.
+    
+    Returns:
+        tuple: (include_consultadd, blog index within the current batch)
+    """
+    allocation = get_consultadd_allocator().allocate()
+    blog_counter = allocation['blog_counter']
+    consultadd_injected = allocation['consultadd_injected']
+    
+    if allocation['previous_batch_injected'] is not None:
+        logger.info("Consultadd batch completed, counters reset. Previous batch: %d/%d blogs included Consultadd",
+                    allocation['previous_batch_injected'], TOTAL_IN_BATCH)
+    
+    if allocation['include']:
+        logger.info("Blog %d: including Consultadd (%d/%d in current batch)",
+                    blog_counter, consultadd_injected, CONSULTADD_RATIO)
+    else:
+        remaining_in_batch = TOTAL_IN_BATCH - blog_counter + 1
+        logger.info("Blog %d: no Consultadd (quota met: %d/%d, %d blogs left in batch)",
+                    blog_counter, consultadd_injected, CONSULTADD_RATIO, remaining_in_batch)
+    return allocation['include'], blog_counter
+
 def should_include_consultadd():
     """
     Determines whether to include Consultadd branding in the current blog.
@@ -373,39 +645,21 @@ def should_include_consultadd():
     - Resets counters after each batch is complete
     - Returns True if Consultadd should be included, False otherwise
     
+    The counters are shared by all threads and processes (see
+    ConsultaddAllocator), so concurrent generations never skew the ratio.
+    
     Returns:
         bool: True if should include Consultadd, False otherwise
     """
-    global blog_counter, consultadd_injected
-    
-    # Reset counters after completing a batch
-    if blog_counter >= TOTAL_IN_BATCH:
-        print(f"\nBatch completed! Resetting counters.")
-        print(f"Previous batch stats: {consultadd_injected}/{TOTAL_IN_BATCH} blogs included Consultadd")
-        blog_counter = 0
-        consultadd_injected = 0
-    
-    # Increment blog counter for current blog
-    blog_counter += 1
-    
-    # Decide whether to include Consultadd based on ratio
-    if consultadd_injected < CONSULTADD_RATIO:
-        consultadd_injected += 1
-        print(f"Blog {blog_counter}: Including Consultadd ({consultadd_injected}/{CONSULTADD_RATIO} in current batch)")
-        return True
-    else:
-        remaining_in_batch = TOTAL_IN_BATCH - blog_counter + 1
-        print(f"Blog {blog_counter}: No Consultadd (quota met: {consultadd_injected}/{CONSULTADD_RATIO}, {remaining_in_batch} blogs left in batch)")
-        return False
+    include, _ = allocate_consultadd()
+    return include
 
 def reset_consultadd_counters():
     """
     Manually reset the Consultadd distribution counters.
     Useful for testing or starting fresh.
     """
-    global blog_counter, consultadd_injected
-    blog_counter = 0
-    consultadd_injected = 0
+    get_consultadd_allocator().reset()
     print("Consultadd distribution counters reset to 0.")
 
 def get_consultadd_status():
@@ -415,7 +669,7 @@ def get_consultadd_status():
     Returns:
         dict: Current status including counters and remaining quota
     """
-    global blog_counter, consultadd_injected
+    blog_counter, consultadd_injected = get_consultadd_allocator().status()
     
     remaining_consultadd = max(0, CONSULTADD_RATIO - consultadd_injected)
     remaining_in_batch = max(0, TOTAL_IN_BATCH - blog_counter)
@@ -431,53 +685,73 @@ def get_consultadd_status():
     }
 
 def log_decision(blog_index, topic, included):
-    file_exists = os.path.isfile(LOG_FILE)
-    with open(LOG_FILE, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["Blog_Index", "Topic", "Consultadd_Included", "Timestamp"])
-        writer.writerow([blog_index, topic, "Yes" if included else "No", time.strftime("%Y-%m-%d %H:%M:%S")])
+    with _log_lock:
+        file_exists = os.path.isfile(LOG_FILE)
+        with open(LOG_FILE, mode="a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(["Blog_Index", "Topic", "Consultadd_Included", "Timestamp"])
+            writer.writerow([blog_index, topic, "Yes" if included else "No", time.strftime("%Y-%m-%d %H:%M:%S")])
 
 # --- Blog Generation ---
-def generate_blogs(topics_data: List[Dict[str, Any]]):
+def generate_blogs(topics_data: List[Dict[str, Any]], model,
+                   max_concurrency: int = BATCH_CONCURRENCY,
+                   limiter: Optional[GeminiRateLimiter] = None):
     """
     Generate blogs from a list of topic data dictionaries.
     Each dictionary should contain: keyword, url, title, description
+
+    Consultadd decisions and prompts are made up front in topic order, so the
+    CONSULTADD_RATIO/TOTAL_IN_BATCH split matches a sequential run. Up to
+    `max_concurrency` Gemini requests are then in flight, paced by a token
+    bucket on the RPM/TPM quotas, with quota errors retried using exponential
+    backoff and jitter. Results are returned in topic order.
     """
-    generated_blogs = []
+    limiter = limiter or GeminiRateLimiter()
+    total = len(topics_data)
     
+    prepared = []
     for i, topic_data in enumerate(topics_data, start=1):
-        print(f"\n{'='*50}")
-        print(f"Processing Blog {i}/{len(topics_data)}")
-        print(f"{'='*50}")
+        prompt, keyword, include_consultadd, blog_index = prepare_blog_prompt(topic_data)
+        prepared.append((i, keyword, prompt, include_consultadd, blog_index))
+    
+    def generate(item):
+        i, keyword, prompt, include_consultadd, blog_index = item
+        logger.info("Processing blog %d/%d: %s", i, total, keyword)
+        
+        def attempt():
+            # Every attempt, including retries, counts against the quota
+            limiter.acquire(estimate_tokens(prompt.text, BLOG_MAX_OUTPUT_TOKENS))
+            return generate_blog_text(prompt, model)
         
         try:
-            blog_content = generate_blog_with_gemini(topic_data)
-            generated_blogs.append({
+            blog_content = call_with_retries(attempt)
+            log_decision(blog_index, keyword, include_consultadd)
+            logger.info("Blog %d/%d generated", i, total)
+            return {
                 'index': i,
-                'keyword': topic_data.get('keyword', ''),
+                'keyword': keyword,
                 'content': blog_content,
                 'success': True
-            })
-            
-            # Add delay between requests to respect API limits
-            if i < len(topics_data):
-                print("Waiting 5 seconds before next generation...")
-                time.sleep(5)
-                
+            }
         except Exception as e:
-            print(f"Failed to generate blog {i}: {str(e)}")
-            generated_blogs.append({
+            logger.warning("Failed to generate blog %d: %s", i, e)
+            return {
                 'index': i,
-                'keyword': topic_data.get('keyword', ''),
+                'keyword': keyword,
                 'content': f"Error: {str(e)}",
                 'success': False
-            })
+            }
+    
+    generated_blogs = []
+    if prepared:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, total))) as executor:
+            generated_blogs = list(executor.map(generate, prepared))
     
     print(f"\n{'='*50}")
     print("GENERATION COMPLETE")
     print(f"{'='*50}")
-    print(f"Successfully generated: {sum(1 for blog in generated_blogs if blog['success'])}/{len(topics_data)} blogs")
+    print(f"Successfully generated: {sum(1 for blog in generated_blogs if blog['success'])}/{total} blogs")
     print(f"Decisions logged to: {LOG_FILE}")
     
     return generated_blogs
@@ -501,6 +775,7 @@ def save_blogs_to_files(generated_blogs: List[Dict], output_dir: str = "generate
 def test_consultadd_distribution(num_tests: int = 20):
     """
     Test the Consultadd distribution logic to verify it works correctly.
+    Uses a temporary allocator database, leaving the live rotation untouched.
     
     Args:
         num_tests (int): Number of test iterations to run
@@ -508,13 +783,17 @@ def test_consultadd_distribution(num_tests: int = 20):
     print(f"Testing Consultadd distribution logic with {num_tests} iterations...")
     print(f"Expected: {CONSULTADD_RATIO} Consultadd blogs per {TOTAL_IN_BATCH} total blogs\n")
     
-    # Reset counters for clean test
-    reset_consultadd_counters()
-    
-    results = []
-    for i in range(num_tests):
-        include = should_include_consultadd()
-        results.append(include)
+    # Run against a throwaway allocator so the shared production state is never touched
+    shared_allocator = _allocator.replace(ConsultaddAllocator(
+        CONSULTADD_RATIO, TOTAL_IN_BATCH, os.path.join(tempfile.mkdtemp(), "consultadd_test.db")
+    ))
+    try:
+        results = []
+        for i in range(num_tests):
+            include = should_include_consultadd()
+            results.append(include)
+    finally:
+        _allocator.replace(shared_allocator)
     
     # Analyze results
     consultadd_count = sum(results)
@@ -557,13 +836,17 @@ def main():
     ]
     
     # Check if API key is available
-    if not GEMINI_API_KEY:
+    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    if MODEL_BACKEND == "gemini" and not GEMINI_API_KEY:
         print("Error: GEMINI_API_KEY not found in environment variables.")
         print("Please add your Gemini API key to a .env file.")
         return
     
+    genai.configure(api_key=GEMINI_API_KEY)
+    model = get_model()
+    
     print("Starting blog generation process...")
-    generated_blogs = generate_blogs(example_topics)
+    generated_blogs = generate_blogs(example_topics, model)
     
     # Save blogs to files
     save_blogs_to_files(generated_blogs)
@@ -574,8 +857,13 @@ if __name__ == "__main__":
     # Uncomment to test the distribution logic
     # test_consultadd_distribution(30)
     
+    # Uncomment to stress test the shared allocator across threads and processes
+    # from consultadd_allocator import stress_test_consultadd_allocator
+    # stress_test_consultadd_allocator(4000)
+    
     # Uncomment to check current status
     # status = get_consultadd_status()
     # print("Current Consultadd Status:", status)
     
+    setup_logging()
     main()
\ No newline at end of file
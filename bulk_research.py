@@ -0,0 +1,223 @@
+"""
+Bulk keyword research: run SEO research for a whole list of keywords.
+
+SERP queries for many keywords run concurrently, paced by a token bucket on
+the Custom Search quota. The URLs they return go into one shared crawl
+frontier, so a URL ranking for several keywords is fetched only once. Each
+(keyword, rank) row is written to a JSONL file as soon as its URL has been
+crawled.
+
+Usage:
+    python bulk_research.py keywords.txt [-o results.jsonl] [--num-results 10]
+        [--search-type competitor] [--serp-workers 4] [--crawl-workers 8] [--qpm 100]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from meta_extraction import extract_meta
+from rate_limit import TokenBucket
+from serp_crawl import get_serp_results
+from log_config import in_current_context, setup_logging
+
+load_dotenv()
+
+# --- Config ---
+BULK_SERP_WORKERS = int(os.getenv("BULK_SERP_WORKERS", "4"))  # keywords queried at once
+BULK_CRAWL_WORKERS = int(os.getenv("BULK_CRAWL_WORKERS", "8"))  # URLs fetched at once
+SERP_QPM = float(os.getenv("SERP_QPM", "100"))  # Custom Search requests per minute
+
+
+def read_keywords(lines: Iterable[str]) -> List[str]:
+    """Keywords from a text source: one per line, blank lines and #comments skipped, duplicates dropped."""
+    keywords = []
+    seen = set()
+    for line in lines:
+        keyword = line.strip()
+        if not keyword or keyword.startswith("#"):
+            continue
+        key = keyword.lower()
+        if key not in seen:
+            seen.add(key)
+            keywords.append(keyword)
+    return keywords
+
+def serp_limiter(qpm: float = SERP_QPM) -> TokenBucket:
+    """Token bucket for Custom Search requests, allowing a burst of a few seconds' quota."""
+    return TokenBucket(qpm / 60.0, max(1.0, qpm / 10.0))
+
+
+class CrawlFrontier:
+    """
+    URLs scheduled for meta extraction, shared by all keywords of a run.
+    submit() returns the same future for a URL however often it is seen.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, fetch: Callable[[str], Dict[str, str]] = extract_meta):
+        self._executor = executor
+        self._fetch = fetch
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.requests = 0  # submit() calls, including duplicates
+
+    def submit(self, url: str) -> Future:
+        with self._lock:
+            self.requests += 1
+            future = self._futures.get(url)
+            if future is None:
+                future = self._executor.submit(in_current_context(self._fetch), url)
+                self._futures[url] = future
+            return future
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+
+class JsonlWriter:
+    """Thread-safe JSONL writer that flushes every row so readers can follow the file."""
+
+    def __init__(self, stream: IO[str]):
+        self._stream = stream
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.statuses = Counter()
+
+    def write(self, row: Dict[str, Any]) -> int:
+        """Write one row and return the number of rows written so far."""
+        line = json.dumps(row, ensure_ascii=False)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+            self.rows += 1
+            self.statuses[row.get('status')] += 1
+            return self.rows
+
+
+def bulk_research(keywords: List[str], output: IO[str], num_results: int = 10,
+                  search_type: str = "competitor", serp_workers: int = BULK_SERP_WORKERS,
+                  crawl_workers: int = BULK_CRAWL_WORKERS, limiter: Optional[TokenBucket] = None,
+                  cancel_event: Optional[threading.Event] = None,
+                  progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Research every keyword and stream one JSON row per (keyword, rank) to `output`.
+
+    Rows have the same fields as seo_research.main results (url, title,
+    description, status, keyword, rank) and are written in completion order.
+    `progress_callback(event, data)` receives a "serp" event per keyword and
+    a "row" event per written row. Setting `cancel_event` stops scheduling
+    new work and drops pending crawls. Returns a summary of the run.
+    """
+    limiter = limiter or serp_limiter()
+    writer = JsonlWriter(output)
+    start = time.perf_counter()
+    summary = {'keywords': len(keywords), 'keywords_without_results': 0}
+    pending_rows = set()
+
+    def cancelled() -> bool:
+        return cancel_event is not None and cancel_event.is_set()
+
+    def write_row(keyword: str, rank: int, url: str, done: Future):
+        if done.cancelled():
+            return
+        if done.exception() is not None:
+            row = {"url": url, "title": "Error", "description": f"Crawl error: {done.exception()}", "status": "failed"}
+        else:
+            row = dict(done.result())  # one URL's result is shared by every keyword it ranks for
+        row['keyword'] = keyword
+        row['rank'] = rank
+        rows = writer.write(row)
+        if progress_callback is not None:
+            progress_callback('row', {'keyword': keyword, 'rank': rank, 'url': url,
+                                      'status': row['status'], 'rows': rows})
+
+    crawl_executor = ThreadPoolExecutor(max_workers=crawl_workers, thread_name_prefix="bulk-crawl")
+    frontier = CrawlFrontier(crawl_executor)
+    try:
+        with ThreadPoolExecutor(max_workers=serp_workers, thread_name_prefix="bulk-serp") as serp_executor:
+            serp_futures = {
+                serp_executor.submit(in_current_context(get_serp_results), keyword, num_results, search_type, limiter=limiter): keyword
+                for keyword in keywords
+            }
+            for done in as_completed(serp_futures):
+                keyword = serp_futures[done]
+                if cancelled():
+                    for future in serp_futures:
+                        future.cancel()
+                    break
+                urls = done.result()
+                if not urls:
+                    summary['keywords_without_results'] += 1
+                if progress_callback is not None:
+                    progress_callback('serp', {'keyword': keyword, 'total': len(urls)})
+
+                # Crawling starts while the remaining SERP queries are still running
+                for rank, url in enumerate(urls, 1):
+                    future = frontier.submit(url)
+                    future.add_done_callback(
+                        lambda crawled, keyword=keyword, rank=rank, url=url: write_row(keyword, rank, url, crawled)
+                    )
+                    pending_rows.add(future)
+
+        # Wait for the crawl, checking for cancellation between completions
+        while pending_rows and not cancelled():
+            _, pending_rows = wait(pending_rows, timeout=1.0, return_when=FIRST_COMPLETED)
+    finally:
+        # Worker threads run the row callbacks, so every row is written once this returns
+        crawl_executor.shutdown(wait=True, cancel_futures=cancelled())
+
+    summary.update({
+        'rows': writer.rows,
+        'unique_urls': len(frontier),
+        'duplicate_urls': frontier.requests - len(frontier),
+        'successful': writer.statuses['success'],
+        'cancelled': cancelled(),
+        'elapsed': round(time.perf_counter() - start, 2),
+    })
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("keywords_file", help="text file with one keyword per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="bulk_research_results.jsonl", help="JSONL output file")
+    parser.add_argument("--num-results", type=int, default=10)
+    parser.add_argument("--search-type", default="competitor", choices=["competitor", "public"])
+    parser.add_argument("--serp-workers", type=int, default=BULK_SERP_WORKERS)
+    parser.add_argument("--crawl-workers", type=int, default=BULK_CRAWL_WORKERS)
+    parser.add_argument("--qpm", type=float, default=SERP_QPM, help="Custom Search requests per minute")
+    args = parser.parse_args()
+    setup_logging()
+
+    if args.keywords_file == "-":
+        keywords = read_keywords(sys.stdin)
+    else:
+        with open(args.keywords_file, encoding="utf-8") as f:
+            keywords = read_keywords(f)
+    if not keywords:
+        print("No keywords found.")
+        return
+
+    print(f"Researching {len(keywords)} keywords...")
+    with open(args.output, "w", encoding="utf-8") as output:
+        summary = bulk_research(keywords, output, num_results=args.num_results, search_type=args.search_type,
+                                serp_workers=args.serp_workers, crawl_workers=args.crawl_workers,
+                                limiter=serp_limiter(args.qpm))
+
+    print("\n" + "=" * 60)
+    print("BULK RESEARCH SUMMARY")
+    print("=" * 60)
+    print(f"Keywords: {summary['keywords']} ({summary['keywords_without_results']} without results)")
+    print(f"Rows written: {summary['rows']}")
+    print(f"Unique URLs crawled: {summary['unique_urls']} ({summary['duplicate_urls']} duplicate hits saved)")
+    print(f"Successful extractions: {summary['successful']}")
+    print(f"Elapsed: {summary['elapsed']}s")
+    print(f"\n✓ Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
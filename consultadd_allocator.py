@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from shared import connect_sqlite, init_sqlite
+
+load_dotenv()
+
+# --- Config ---
+CONSULTADD_STATE_PATH = os.getenv("CONSULTADD_STATE_PATH", ".cache/consultadd_state.db")
+
+
+class ConsultaddAllocator:
+    """
+    Shared Consultadd distribution state stored in SQLite.
+
+    Each allocate() runs in a BEGIN IMMEDIATE transaction, which takes the
+    database write lock, so the read-modify-write of the counters is atomic
+    across threads, gunicorn workers and restarts.
+    """
+
+    def __init__(self, ratio: int, batch_size: int, path: str = CONSULTADD_STATE_PATH):
+        self.ratio = ratio
+        self.batch_size = batch_size
+        self.path = path
+
+        init_sqlite(path, self._connect, """
+            CREATE TABLE IF NOT EXISTS consultadd_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                blog_counter INTEGER NOT NULL,
+                consultadd_injected INTEGER NOT NULL,
+                total_allocated INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO consultadd_state VALUES (1, 0, 0, 0);
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode so transactions are controlled explicitly
+        return connect_sqlite(self.path, timeout=60, isolation_level=None)
+
+    def allocate(self) -> Dict[str, int]:
+        """
+        Atomically decide whether the next blog includes Consultadd.
+
+        Returns a dict with `include`, the in-batch `blog_counter` and
+        `consultadd_injected` after this allocation, the global `sequence`
+        number, and `previous_batch_injected` when a batch was just reset.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                blog_counter, consultadd_injected, total = conn.execute(
+                    "SELECT blog_counter, consultadd_injected, total_allocated FROM consultadd_state WHERE id = 1"
+                ).fetchone()
+
+                # Reset counters after completing a batch
+                previous_batch_injected = None
+                if blog_counter >= self.batch_size:
+                    previous_batch_injected = consultadd_injected
+                    blog_counter = 0
+                    consultadd_injected = 0
+
+                blog_counter += 1
+                include = consultadd_injected < self.ratio
+                if include:
+                    consultadd_injected += 1
+                total += 1
+
+                conn.execute(
+                    "UPDATE consultadd_state SET blog_counter = ?, consultadd_injected = ?, total_allocated = ? WHERE id = 1",
+                    (blog_counter, consultadd_injected, total),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return {
+            'include': include,
+            'blog_counter': blog_counter,
+            'consultadd_injected': consultadd_injected,
+            'sequence': total,
+            'previous_batch_injected': previous_batch_injected,
+        }
+
+    def status(self) -> Tuple[int, int]:
+        """Current (blog_counter, consultadd_injected)."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT blog_counter, consultadd_injected FROM consultadd_state WHERE id = 1"
+            ).fetchone()
+
+    def reset(self):
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE consultadd_state SET blog_counter = 0, consultadd_injected = 0 WHERE id = 1")
+
+
+# --- Testing Functions ---
+def _allocate_many(path: str, ratio: int, batch_size: int, count: int, threads: int) -> List[Tuple[int, bool]]:
+    """Worker for the stress test: allocate `count` times from `threads` threads."""
+    allocator = ConsultaddAllocator(ratio, batch_size, path)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda _: allocator.allocate(), range(count)))
+    return [(r['sequence'], r['include']) for r in results]
+
+def stress_test_consultadd_allocator(num_generations: int = 4000, num_processes: int = 4,
+                                     num_threads: int = 8, ratio: int = 1, batch_size: int = 2,
+                                     path: Optional[str] = None) -> bool:
+    """
+    Hammer a fresh allocator from several processes and threads and check
+    that every complete batch got exactly `ratio` Consultadd blogs.
+    """
+    import multiprocessing
+
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "consultadd_stress.db")
+    ConsultaddAllocator(ratio, batch_size, path)  # create schema before workers race
+
+    per_process = [num_generations // num_processes] * num_processes
+    per_process[-1] += num_generations - sum(per_process)
+
+    print(f"Stress testing allocator: {num_generations} allocations, "
+          f"{num_processes} processes x {num_threads} threads, ratio {ratio}/{batch_size}")
+    start = time.perf_counter()
+    with multiprocessing.Pool(num_processes) as pool:
+        chunks = pool.starmap(
+            _allocate_many,
+            [(path, ratio, batch_size, count, num_threads) for count in per_process],
+        )
+    elapsed = time.perf_counter() - start
+
+    allocations = sorted(item for chunk in chunks for item in chunk)
+    sequences = [sequence for sequence, _ in allocations]
+    unique_ok = sequences == list(range(1, num_generations + 1))
+
+    batches = {}
+    for sequence, include in allocations:
+        batches.setdefault((sequence - 1) // batch_size, []).append(include)
+    complete = [sum(b) for b in batches.values() if len(b) == batch_size]
+    ratio_ok = all(count == ratio for count in complete)
+
+    total_included = sum(include for _, include in allocations)
+    print(f"Completed in {elapsed:.2f}s ({num_generations / elapsed:.0f} allocations/s)")
+    print(f"Consultadd blogs: {total_included}/{num_generations}")
+    print(f"Unique sequence numbers: {'✓ PASS' if unique_ok else '✗ FAIL'}")
+    print(f"Every complete batch has {ratio}/{batch_size}: {'✓ PASS' if ratio_ok else '✗ FAIL'}")
+    return unique_ok and ratio_ok
+
+if __name__ == "__main__":
+    stress_test_consultadd_allocator()
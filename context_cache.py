@@ -0,0 +1,200 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Tuple
+import google.generativeai as genai
+from google.api_core.exceptions import FailedPrecondition, InvalidArgument, NotFound, PermissionDenied
+from google.generativeai import caching
+from dotenv import load_dotenv
+from shared import Counters, Lazy, rate
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# --- Config ---
+CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "1") == "1"
+CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))  # seconds a cached prefix lives
+CONTEXT_CACHE_REFRESH_MARGIN = int(os.getenv("GEMINI_CONTEXT_CACHE_REFRESH_MARGIN", "300"))  # extend TTL this early
+CONTEXT_CACHE_RETRY_AFTER = int(os.getenv("GEMINI_CONTEXT_CACHE_RETRY_AFTER", "600"))  # after a transient failure
+# Smallest prefix Gemini accepts as cached content; model dependent, see the context caching docs
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+
+# Errors that mean this prefix can never be cached with this model
+# (too few tokens, model without caching support, no access)
+PERMANENT_ERRORS = (InvalidArgument, FailedPrecondition, NotFound, PermissionDenied)
+
+
+class ContextCache:
+    """
+    Serves static system-instruction prefixes from Gemini cached content.
+
+    bind() returns a model bound to the cached prefix plus the contents to
+    send, so each call only pays for the per-request suffix. A prefix is
+    registered once per model, and its TTL is extended when a call arrives
+    within `refresh_margin` seconds of expiry. Prefixes shorter than
+    `min_tokens` are never uploaded, since Gemini rejects them. Whenever the
+    prefix is not cached, and for objects that are not Gemini models (local
+    stand-ins), the model is called with the whole prompt as one string.
+    """
+
+    COUNTERS = ("hits", "created", "refreshed", "fallbacks", "errors")  # stats() keys that only increase
+
+    def __init__(self, enabled: bool = CONTEXT_CACHE_ENABLED, ttl: int = CONTEXT_CACHE_TTL,
+                 refresh_margin: int = CONTEXT_CACHE_REFRESH_MARGIN, retry_after: int = CONTEXT_CACHE_RETRY_AFTER,
+                 min_tokens: int = CONTEXT_CACHE_MIN_TOKENS):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl // 2)
+        self.retry_after = retry_after
+        self.min_tokens = min_tokens
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._counters = Counters(self.COUNTERS)
+
+    def bind(self, model, system_instruction: str, request: str, text: str) -> Tuple[Any, Any]:
+        """
+        Return (model to call, contents) for a static prefix and a per-request
+        suffix. `text` is the same prompt as one string, sent when the prefix
+        is not served from the cache.
+        """
+        if not isinstance(model, genai.GenerativeModel):
+            # Local stand-in models get the whole prompt in one piece
+            return model, text
+
+        key = (model.model_name, hashlib.sha256(system_instruction.encode("utf-8")).hexdigest())
+        if self.enabled:
+            cached_model = self._cached_model(key, system_instruction)
+            if cached_model is not None:
+                return cached_model, request
+        self._counters.inc("fallbacks")
+        return model, text
+
+    def _cached_model(self, key: Tuple[str, str], system_instruction: str):
+        # _lock only guards reading and publishing entries; the remote create/update
+        # calls run under a per-prefix lock so cache hits and other prefixes never wait on them
+        entry = self._usable_entry(key)
+        if entry is not None:
+            return entry["model"] if entry else None
+
+        key_lock = self._key_lock(key)
+        if not key_lock.acquire(blocking=False):
+            # Another thread is refreshing this prefix; keep using it while it is alive
+            entry = self._usable_entry(key, allow_refresh_window=True)
+            if entry:
+                return entry["model"]
+            key_lock.acquire()
+        try:
+            # The entry may have been created or refreshed while we waited
+            entry = self._usable_entry(key)
+            if entry is not None:
+                return entry["model"] if entry else None
+            return self._create_or_refresh(key, system_instruction)
+        finally:
+            key_lock.release()
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _usable_entry(self, key: Tuple[str, str], allow_refresh_window: bool = False):
+        """The entry if it can be used as is, False while caching is unavailable, None if it needs work."""
+        margin = 0 if allow_refresh_window else self.refresh_margin
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is not None and entry.get("retry_at") is not None:
+                if entry["retry_at"] == float("inf") or now < entry["retry_at"]:
+                    return False
+                return None
+            if entry is not None and now < entry["expires_at"] - margin:
+                self._counters.inc("hits")
+                return entry
+            return None
+
+    def _create_or_refresh(self, key: Tuple[str, str], system_instruction: str):
+        """Refresh a live entry or register the prefix. Called with the prefix's lock held."""
+        model_name = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+        now = time.time()
+
+        if entry is not None and entry.get("retry_at") is None and now < entry["expires_at"]:
+            # Still alive: push the expiry out instead of re-uploading the prefix
+            try:
+                entry["cached"].update(ttl=timedelta(seconds=self.ttl))
+                with self._lock:
+                    entry["expires_at"] = now + self.ttl
+                self._counters.inc("refreshed")
+                return entry["model"]
+            except Exception as e:
+                logger.warning("Context cache refresh failed (%.80s), re-creating", e)
+
+        try:
+            if entry is None or entry.get("cached") is None:
+                # Uploading a prefix below the minimum only fails; check before the first upload
+                tokens = genai.GenerativeModel(model_name).count_tokens(system_instruction).total_tokens
+                if tokens < self.min_tokens:
+                    with self._lock:
+                        self._entries[key] = {"retry_at": float("inf")}
+                    logger.info("Prompt prefix for %s is %d tokens, below the %d token minimum for cached "
+                                "content; sending whole prompts", model_name, tokens, self.min_tokens)
+                    return None
+            cached = caching.CachedContent.create(
+                model=model_name,
+                display_name=f"blog-prompt-{key[1][:12]}",
+                system_instruction=system_instruction,
+                ttl=timedelta(seconds=self.ttl),
+            )
+        except Exception as e:
+            permanent = isinstance(e, PERMANENT_ERRORS)
+            with self._lock:
+                self._entries[key] = {"retry_at": float("inf") if permanent else now + self.retry_after}
+            self._counters.inc("errors")
+            logger.warning("Context caching unavailable for %s (%.80s); sending whole prompts%s",
+                           model_name, e, "" if permanent else " for now")
+            return None
+
+        entry = {
+            "cached": cached,
+            "model": genai.GenerativeModel.from_cached_content(cached),
+            "expires_at": now + self.ttl,
+            "retry_at": None,
+        }
+        with self._lock:
+            self._entries[key] = entry
+        self._counters.inc("created")
+        return entry["model"]
+
+    def clear(self):
+        """Delete registered cached content and forget all bound models."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            if entry.get("cached") is not None:
+                try:
+                    entry["cached"].delete()
+                except Exception:
+                    pass
+
+    def stats(self) -> Dict[str, float]:
+        """Cache usage counters since process start."""
+        stats = self._counters.snapshot()
+        with self._lock:
+            stats["cached_prefixes"] = sum(1 for entry in self._entries.values() if entry.get("cached") is not None)
+        calls = stats["hits"] + stats["created"] + stats["refreshed"] + stats["fallbacks"]
+        stats["hit_rate"] = rate(stats["hits"] + stats["refreshed"], calls)
+        return stats
+
+
+# --- Shared instance ---
+_cache = Lazy(ContextCache)
+
+def get_context_cache() -> ContextCache:
+    """Return the process-wide context cache, creating it on first use."""
+    return _cache.get()
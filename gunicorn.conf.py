@@ -0,0 +1,31 @@
+"""
+Gunicorn settings for the web app (gunicorn reads ./gunicorn.conf.py by default):
+
+    gunicorn app:app
+
+The app must run as ONE process with a threaded worker:
+- JobManager keeps jobs and their event history in process memory, so the
+  POST that starts a job and its /*_status and /*_events requests have to
+  reach the same process.
+- Each Server-Sent Events stream holds a request thread for the whole job
+  (30-60s for a blog); a sync worker would be tied up by a single stream.
+Scale with GUNICORN_THREADS, one thread per concurrent request including
+open streams. Settings that break either rule are refused at startup.
+"""
+import os
+
+# --- Config ---
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+workers = 1
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+
+
+def on_starting(server):
+    """Refuse overrides such as `-w 4` or `-k sync` from the command line."""
+    if server.cfg.workers != 1:
+        raise RuntimeError(
+            f"Job state is per process; run 1 worker and raise GUNICORN_THREADS instead of {server.cfg.workers} workers"
+        )
+    if server.cfg.worker_class_str == "sync":
+        raise RuntimeError("Event streams need a threaded (gthread) or async (gevent) worker, not sync")
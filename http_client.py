@@ -0,0 +1,101 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Config ---
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))  # seconds to establish a connection
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))  # seconds to wait between bytes
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))  # number of hosts kept in the pool
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))  # keep-alive connections per host
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRY_AFTER = float(os.getenv("HTTP_MAX_RETRY_AFTER", "5"))  # longest Retry-After wait honoured, seconds
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+
+class CappedRetry(Retry):
+    """
+    Retry that honours Retry-After only up to MAX_RETRY_AFTER seconds.
+    Crawled sites control the header, and urllib3 would otherwise sleep for
+    whatever they send, outside the read timeout.
+    """
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER)
+
+
+# --- State ---
+_session = None
+_session_lock = threading.Lock()
+
+def create_session() -> requests.Session:
+    """
+    Build a requests.Session with keep-alive pooling and retry/backoff.
+
+    Retries cover connection errors and 429/5xx responses (honouring
+    Retry-After up to MAX_RETRY_AFTER seconds). The final response is
+    returned as-is so callers can still use raise_for_status().
+    """
+    retry = CappedRetry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide crawl session, creating it on first use.
+    The underlying urllib3 pools are thread-safe, so one session is
+    shared by every worker thread.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def fetch(url: str, **kwargs) -> requests.Response:
+    """GET a URL through the shared session with separate connect/read timeouts."""
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+    return get_session().get(url, **kwargs)
+
+def close_session():
+    """Close the shared session and drop pooled connections."""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from log_config import correlation_id
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a JobManager already has its maximum number of pending jobs."""
+
+
+class Job:
+    """A unit of background work with its own status, progress, result and cancel flag."""
+
+    def __init__(self, kind: str, info: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.info = dict(info or {})  # public details such as keyword or filename
+        self.status = "queued"  # queued -> running -> completed / failed / cancelled
+        self.progress = "Queued..."
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.events: List[Dict[str, Any]] = []  # progress events, in publish order
+        self._events_changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """Append a progress event and wake any listeners."""
+        with self._events_changed:
+            self.events.append({'id': len(self.events), 'type': event_type, 'data': data})
+            self._events_changed.notify_all()
+
+    def iter_events(self, start: int = 0, keepalive: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events from index `start` as they are published, ending after
+        the job's final event. Yields None every `keepalive` seconds of silence.
+        """
+        position = start
+        while True:
+            with self._events_changed:
+                if position >= len(self.events) and not self.finished:
+                    self._events_changed.wait(keepalive)
+                pending = self.events[position:]
+                finished = self.finished
+            if not pending and not finished:
+                yield None
+            for event in pending:
+                yield event
+            position += len(pending)
+            if finished and position >= len(self.events):
+                return
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        """Status snapshot for the JSON API; results are omitted unless requested."""
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'running': self.status in ("queued", "running"),
+            'completed': self.finished,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        data.update(self.info)
+        if isinstance(self.result, list):
+            data['result_count'] = len(self.result)
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+class JobManager:
+    """
+    Runs many jobs concurrently on a bounded thread pool.
+
+    `max_workers` jobs run at once; at most `max_pending` jobs may be queued or
+    running before submit() raises QueueFullError. Finished jobs are kept for
+    lookup until more than `max_finished` have accumulated.
+    """
+
+    def __init__(self, kind: str, max_workers: int = 4, max_pending: int = 20, max_finished: int = 200):
+        self.kind = kind
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{kind}-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args, info: Optional[Dict[str, Any]] = None, **kwargs) -> Job:
+        """
+        Queue `fn(job, *args, **kwargs)` and return its Job.
+        The function's return value becomes job.result.
+        """
+        job = Job(self.kind, info)
+        with self._lock:
+            pending = sum(1 for existing in self._jobs.values() if not existing.finished)
+            if pending >= self.max_pending:
+                raise QueueFullError(f"Too many {self.kind} jobs in progress ({pending}). Please try again shortly.")
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info("Queued %s job %s", self.kind, job.id)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs):
+        # Everything the job logs, including its worker pools, carries its ID
+        with correlation_id(f"{self.kind}-{job.id}"):
+            self._run_job(job, fn, args, kwargs)
+
+    def _run_job(self, job: Job, fn, args, kwargs):
+        if job.cancelled:
+            self._finish(job, "cancelled", "Cancelled.")
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            if job.cancelled:
+                self._finish(job, "cancelled", "Cancelled.")
+            else:
+                self._finish(job, "completed")
+        except Exception as e:
+            logger.exception("%s job %s failed", self.kind, job.id)
+            job.error = str(e)
+            self._finish(job, "failed", f"Error: {str(e)}")
+
+    def _finish(self, job: Job, status: str, progress: Optional[str] = None):
+        job.finished_at = time.time()
+        if progress is not None:
+            job.progress = progress
+        # The final event carries the full result exactly once
+        with job._events_changed:
+            job.status = status
+            job.publish('done', job.to_dict(include_result=True))
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond max_finished. Caller holds the lock."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation. Queued jobs never start; running jobs see
+        job.cancel_event and stop at their next checkpoint.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, "cancelled", "Cancelled.")
+        return True
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def stats(self) -> Dict[str, int]:
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0, "cancelled": 0}
+        for job in self.list():
+            counts[job.status] += 1
+        return counts
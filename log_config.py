@@ -0,0 +1,164 @@
+"""
+Logging setup shared by the web app and the command-line tools.
+
+Records are put on a bounded in-memory queue by the thread that logs them
+and written to the console by a single listener thread, so workers never
+block on stdout and lines from concurrent jobs never interleave. Each
+record carries the correlation ID of the request or job it belongs to.
+
+Configuration (environment):
+    LOG_LEVEL=INFO                                   root level
+    LOG_LEVELS=meta_extraction=WARNING,serp_crawl=DEBUG   per-module levels
+    LOG_FORMAT=text|json
+    LOG_QUEUE_SIZE=10000                             records buffered before dropping
+"""
+import atexit
+import contextvars
+import copy
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Config ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # module=LEVEL pairs, comma separated
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(correlation_id)s] %(name)s: %(message)s"
+
+_correlation_id: contextvars.ContextVar[str] = contextvars.ContextVar("correlation_id", default="-")
+
+
+def get_correlation_id() -> str:
+    return _correlation_id.get()
+
+@contextmanager
+def correlation_id(value: str) -> Iterator[str]:
+    """Tag every record logged inside the block (in this thread or context) with `value`."""
+    token = _correlation_id.set(value)
+    try:
+        yield value
+    finally:
+        _correlation_id.reset(token)
+
+def set_correlation_id(value: str) -> contextvars.Token:
+    """Set the correlation ID until reset_correlation_id(token); for request hooks that cannot use a with block."""
+    return _correlation_id.set(value)
+
+def reset_correlation_id(token: contextvars.Token):
+    _correlation_id.reset(token)
+
+def in_current_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Bind `fn` to a copy of the caller's context, so work handed to an executor
+    thread keeps the caller's correlation ID. Use one call per submitted task.
+    """
+    return functools.partial(contextvars.copy_context().run, fn)
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """'module=LEVEL,other=LEVEL' -> {module: level}. Malformed entries are ignored."""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        level = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(level, int):
+            levels[name.strip()] = level
+    return levels
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamps records with the current correlation ID. Runs in the logging thread, before queueing."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "correlation_id": getattr(record, "correlation_id", "-"),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge the message arguments but keep exc_info/stack_info, so the
+        listener's formatter renders tracebacks (JSON puts them in "exception").
+        The base class would fold them into the message text instead.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# --- Shared instance ---
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+def setup_logging(level: str = LOG_LEVEL, levels: str = LOG_LEVELS, fmt: str = LOG_FORMAT,
+                  queue_size: int = LOG_QUEUE_SIZE) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to one console writer thread.
+    Safe to call more than once; only the first call configures logging.
+    """
+    global _listener
+
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        handler = DroppingQueueHandler(log_queue)
+        handler.addFilter(CorrelationFilter())
+
+        root = logging.getLogger()
+        root.handlers[:] = [handler]
+        root.setLevel(level)
+        for name, module_level in parse_levels(levels).items():
+            logging.getLogger(name).setLevel(module_level)
+
+        _listener = logging.handlers.QueueListener(log_queue, console, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)  # flush queued records on exit
+        return _listener
@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from shared import Counters, Lazy, connect_sqlite, init_sqlite, rate
+
+load_dotenv()
+
+# --- Config ---
+META_CACHE_ENABLED = os.getenv("META_CACHE_ENABLED", "1") == "1"
+META_CACHE_PATH = os.getenv("META_CACHE_PATH", ".cache/meta_cache.db")
+META_CACHE_TTL = int(os.getenv("META_CACHE_TTL", str(24 * 3600)))  # seconds before a page is revalidated
+META_CACHE_NEGATIVE_TTL = int(os.getenv("META_CACHE_NEGATIVE_TTL", str(3600)))  # seconds a failure is remembered
+META_CACHE_MAX_ENTRIES = int(os.getenv("META_CACHE_MAX_ENTRIES", "20000"))
+
+
+class MetaCache:
+    """
+    Persistent per-URL cache of extract_meta results.
+
+    Successful (and skipped) results stay fresh for `ttl` seconds; after that
+    the stored ETag/Last-Modified validators are used for a conditional
+    request so unchanged pages cost a 304. Failures are cached for
+    `negative_ttl` seconds. The table is bounded to `max_entries` rows,
+    evicting the least recently used URLs.
+    """
+
+    COUNTERS = ("hits", "negative_hits", "revalidations", "not_modified", "misses", "evictions")  # stats() keys that only increase
+
+    def __init__(self, path: str = META_CACHE_PATH, ttl: int = META_CACHE_TTL,
+                 negative_ttl: int = META_CACHE_NEGATIVE_TTL, max_entries: int = META_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._counters = Counters(self.COUNTERS)
+
+        init_sqlite(path, self._connect, """
+            CREATE TABLE IF NOT EXISTS meta_cache (
+                url TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                status TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_meta_cache_last_access ON meta_cache (last_access);
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect_sqlite(self.path)
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """
+        Return the cached entry for a URL, or None on a miss.
+
+        The entry contains `result` (a fresh copy of the extract_meta dict),
+        `fresh` (usable without a request) and the stored validators.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT title, description, status, etag, last_modified, fetched_at FROM meta_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE meta_cache SET last_access = ? WHERE url = ?", (now, url))
+
+        if row is None:
+            self._counters.inc("misses")
+            return None
+
+        title, description, status, etag, last_modified, fetched_at = row
+        ttl = self.negative_ttl if status == "failed" else self.ttl
+        fresh = now - fetched_at <= ttl
+
+        if fresh:
+            self._counters.inc("negative_hits" if status == "failed" else "hits")
+        elif status == "failed" or not (etag or last_modified):
+            # Nothing to revalidate with; treat as a miss
+            self._counters.inc("misses")
+            return None
+        else:
+            self._counters.inc("revalidations")
+
+        return {
+            "result": {"url": url, "title": title, "description": description, "status": status},
+            "fresh": fresh,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Request headers for revalidating a cached entry."""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def mark_not_modified(self, url: str):
+        """Record a 304 response: the cached entry is fresh again."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE meta_cache SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+        self._counters.inc("not_modified")
+
+    def store(self, result: Dict[str, str], etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Store an extract_meta result with its response validators."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO meta_cache
+                   (url, title, description, status, etag, last_modified, fetched_at, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (result["url"], result["title"], result["description"], result["status"],
+                 etag, last_modified, now, now),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM meta_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM meta_cache WHERE url IN (SELECT url FROM meta_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self._counters.inc("evictions", overflow)
+
+    def invalidate(self, url: str) -> bool:
+        """Drop a single URL from the cache. Returns True if it was cached."""
+        with closing(self._connect()) as conn, conn:
+            deleted = conn.execute("DELETE FROM meta_cache WHERE url = ?", (url,)).rowcount
+        return deleted > 0
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM meta_cache")
+
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since process start."""
+        stats = self._counters.snapshot()
+        lookups = stats["hits"] + stats["negative_hits"] + stats["revalidations"] + stats["misses"]
+        served = stats["hits"] + stats["negative_hits"] + stats["not_modified"]
+        stats["hit_rate"] = rate(served, lookups)
+        return stats
+
+
+# --- Shared instance ---
+_cache = Lazy(MetaCache)
+
+def get_meta_cache() -> MetaCache:
+    """Return the process-wide meta cache, creating it on first use."""
+    return _cache.get()
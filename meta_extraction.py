@@ -1,81 +1,243 @@
+import logging
 import requests
-from bs4 import BeautifulSoup
 import time
-from typing import Dict
+import os
+import threading
+import codecs
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from http_client import fetch
+from meta_parser import create_parser, parse_meta, PARSER_BACKEND
+from meta_cache import MetaCache, get_meta_cache, META_CACHE_ENABLED
+from metrics import record_stage, timed
+from log_config import in_current_context, setup_logging
 
-def extract_meta(url: str) -> Dict[str, str]:
-    """Extract meta information from a URL with robust error handling."""
-    result = {"url": url, "title": "Error", "description": "Error", "status": "failed"}
-    
-    print(f"    Extracting meta from: {url[:50]}...")
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Concurrency / politeness settings
+MAX_WORKERS = int(os.getenv("META_MAX_WORKERS", "5"))  # max URLs fetched in flight
+POLITENESS_DELAY = float(os.getenv("META_POLITENESS_DELAY", "0.5"))  # seconds between hits on one host
+
+# Streaming settings (head-only download)
+STREAMING = os.getenv("META_STREAMING", "1") == "1"
+STREAM_CHUNK_SIZE = 16 * 1024
+STREAM_MAX_BYTES = int(os.getenv("META_STREAM_MAX_BYTES", str(512 * 1024)))
+
+_host_lock = threading.Lock()
+_host_next_slot: Dict[str, float] = {}
+
+def wait_for_host(url: str) -> None:
+    """
+    Block until the politeness delay for the URL's host has elapsed.
+    Each caller reserves the next free slot for its host, so requests to
+    different domains never wait on each other.
+    """
+    host = urlparse(url).netloc.lower()
+    with _host_lock:
+        now = time.monotonic()
+        slot = max(now, _host_next_slot.get(host, 0.0))
+        _host_next_slot[host] = slot + POLITENESS_DELAY
+    delay = slot - now
+    if delay > 0:
+        time.sleep(delay)
+
+def parse_meta_stream(response, backend: str = PARSER_BACKEND,
+                      max_bytes: int = STREAM_MAX_BYTES) -> Tuple[str, str]:
+    """
+    Extract (title, description) from a streamed response.
+    Chunks are fed to an incremental parser and reading stops as soon as the
+    fields are known or `max_bytes` have been read. Only the parser work is
+    recorded as the parse stage; waiting for chunks belongs to url_fetch.
+    """
+    # requests falls back to ISO-8859-1 for text/* without a charset; prefer utf-8
+    encoding = response.encoding if 'charset' in response.headers.get('content-type', '').lower() else None
+    try:
+        decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
     
+    parser = create_parser(backend)
+    parse_seconds = 0.0
+    bytes_read = 0
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        }
-        
-        response = requests.get(url, timeout=10, headers=headers, allow_redirects=True)
-        response.raise_for_status()
-        
-        # Check if content is HTML
-        content_type = response.headers.get('content-type', '').lower()
-        if 'html' not in content_type:
-            result.update({
-                "title": "Non-HTML Content",
-                "description": f"Content type: {content_type}",
-                "status": "skipped"
-            })
-            return result
-        
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Extract title
-        title = "No Title"
-        if soup.title and soup.title.string:
-            title = soup.title.string.strip()
-        elif soup.find("h1"):
-            title = soup.find("h1").get_text().strip()
-        
-        # Extract description with fallbacks
-        description = "No Description"
-        
-        # Try meta description
-        desc_tag = soup.find("meta", attrs={"name": "description"})
-        if desc_tag and desc_tag.get('content'):
-            description = desc_tag['content'].strip()
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            if not chunk:
+                continue
+            bytes_read += len(chunk)
+            started = time.perf_counter()
+            parser.feed(decoder.decode(chunk))
+            parse_seconds += time.perf_counter() - started
+            if parser.done or bytes_read >= max_bytes:
+                break
         else:
-            # Try Open Graph description
-            og_desc = soup.find("meta", attrs={"property": "og:description"})
-            if og_desc and og_desc.get('content'):
-                description = og_desc['content'].strip()
-            else:
-                # Fallback to first paragraph
-                first_p = soup.find("p")
-                if first_p:
-                    description = first_p.get_text().strip()[:160] + "..."
-        
-        result.update({
-            "title": title[:100],  # Limit title length
-            "description": description[:300],  # Limit description length
-            "status": "success"
-        })
+            started = time.perf_counter()
+            parser.feed(decoder.decode(b'', final=True))
+            parse_seconds += time.perf_counter() - started
         
-        print(f"    ✓ Success: {title[:30]}...")
-        
-        # Be respectful with delays
-        time.sleep(0.5)
+        started = time.perf_counter()
+        parser.close()
+        meta = parser.meta()
+        parse_seconds += time.perf_counter() - started
+    except requests.RequestException:
+        raise  # a network error while reading, not a parse failure
+    except Exception:
+        record_stage("parse", parse_seconds, failed=True)
+        raise
+    
+    record_stage("parse", parse_seconds)
+    return meta
+
+@timed("url_fetch", failed=lambda fetched: fetched[0]["status"] == "failed")
+def fetch_meta(url: str, cached: Optional[Dict] = None, streaming: bool = STREAMING,
+               backend: str = PARSER_BACKEND) -> Tuple[Dict[str, str], Optional[str], Optional[str], bool]:
+    """
+    Download one page and parse its meta fields, revalidating `cached` (a
+    MetaCache.lookup() entry) when given. Never raises; failures come back as
+    a "failed" result. Returns (result, etag, last_modified, not_modified).
+
+    Timed as the url_fetch stage: network plus parsing, without cache lookups
+    or the politeness delay. Parsing is also recorded on its own as the parse
+    stage, so parse time is included in both.
+    """
+    result = {"url": url, "title": "Error", "description": "Error", "status": "failed"}
+    etag = last_modified = None
+    try:
+        # Shared keep-alive session (connection reuse, retry/backoff on 429/5xx)
+        response = fetch(url, allow_redirects=True, stream=streaming,
+                         headers=MetaCache.conditional_headers(cached))
+        try:
+            if response.status_code == 304 and cached is not None:
+                logger.debug("Not modified: %.50s", url)
+                return cached["result"], None, None, True
+            
+            response.raise_for_status()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            
+            # Check if content is HTML
+            content_type = response.headers.get('content-type', '').lower()
+            if 'html' not in content_type:
+                result.update({
+                    "title": "Non-HTML Content",
+                    "description": f"Content type: {content_type}",
+                    "status": "skipped"
+                })
+            else:
+                if streaming:
+                    title, description = parse_meta_stream(response, backend)
+                else:
+                    title, description = parse_meta(response.text, backend)
+                
+                result.update({
+                    "title": title[:100],  # Limit title length
+                    "description": description[:300],  # Limit description length
+                    "status": "success"
+                })
+                
+                logger.debug("Extracted %.50s: %.30s", url, title)
+        finally:
+            # Stops the download early when streaming
+            response.close()
         
     except requests.RequestException as e:
         result["description"] = f"Request error: {str(e)}"
-        print(f"    ✗ Request failed: {str(e)[:50]}")
+        logger.info("Request failed for %.50s: %.80s", url, e)
     except Exception as e:
         result["description"] = f"Parsing error: {str(e)}"
-        print(f"    ✗ Parse failed: {str(e)[:50]}")
+        logger.info("Parse failed for %.50s: %.80s", url, e)
+    
+    return result, etag, last_modified, False
+
+def extract_meta(url: str, streaming: bool = STREAMING, backend: str = PARSER_BACKEND,
+                 use_cache: bool = META_CACHE_ENABLED) -> Dict[str, str]:
+    """
+    Extract meta information from a URL with robust error handling.
+    In streaming mode only the start of the page is downloaded; the
+    connection is closed as soon as the head fields have been parsed.
+    Results are cached per URL and revalidated with ETag/Last-Modified; if
+    revalidating a stale entry fails, the stale result is returned instead.
+    A broken cache database is logged and treated as a miss.
+    """
+    cache = cached = None
+    if use_cache:
+        # An unusable cache database (locked, read-only, corrupt) counts as a miss
+        try:
+            cache = get_meta_cache()
+            cached = cache.lookup(url)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Meta cache lookup failed for %.50s: %s", url, e)
+    if cached is not None and cached["fresh"]:
+        logger.debug("Cached: %.50s", url)
+        return cached["result"]
+    
+    logger.debug("Extracting meta from: %.50s", url)
+    
+    # Be respectful with delays (per host)
+    wait_for_host(url)
+    
+    result, etag, last_modified, not_modified = fetch_meta(url, cached, streaming, backend)
+    if result["status"] == "failed" and cached is not None:
+        # A transient failure must not replace a good (if stale) entry; serve it and retry next time
+        logger.info("Serving stale cached meta for %.50s", url)
+        return cached["result"]
+    
+    # Cache problems (locked or full database) never fail the extraction itself
+    try:
+        if not_modified:
+            cache.mark_not_modified(url)
+        elif cache:
+            cache.store(result, etag, last_modified)
+    except sqlite3.Error as e:
+        logger.warning("Meta cache update failed for %.50s: %s", url, e)
     
     return result
 
+def extract_meta_batch(urls: List[str], max_workers: int = MAX_WORKERS,
+                       cancel_event: Optional[threading.Event] = None,
+                       on_result: Optional[Callable[[int, Dict[str, str]], None]] = None) -> List[Dict[str, str]]:
+    """
+    Extract meta information from several URLs using a bounded thread pool.
+    Results are returned in the same order as the input URLs. If
+    `cancel_event` is set, pending URLs are dropped and the results gathered
+    so far are returned. `on_result(index, meta)` is called as each URL
+    finishes, in completion order.
+    """
+    if not urls:
+        return []
+    if max_workers <= 1:
+        results = []
+        for url in urls:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            meta = extract_meta(url)
+            if on_result is not None:
+                on_result(len(results), meta)
+            results.append(meta)
+        return results
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        futures = [executor.submit(in_current_context(extract_meta), url) for url in urls]
+        if on_result is not None:
+            for index, future in enumerate(futures):
+                future.add_done_callback(
+                    lambda done, index=index: done.cancelled() or on_result(index, done.result())
+                )
+        results = []
+        for future in futures:
+            if cancel_event is not None and cancel_event.is_set():
+                for pending in futures:
+                    pending.cancel()
+                break
+            results.append(future.result())
+        return results
+
 if __name__ == "__main__":
     # Test the function
+    setup_logging()
     test_url = "https://example.com"
     print(extract_meta(test_url))
\ No newline at end of file
@@ -0,0 +1,307 @@
+import logging
+import os
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from bs4 import BeautifulSoup
+from metrics import timed
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # lxml is optional
+    lxml_etree = None
+
+logger = logging.getLogger(__name__)
+
+# Parser backend used by extract_meta: "htmlparser", "lxml" or "bs4"
+PARSER_BACKEND = os.getenv("META_PARSER_BACKEND", "htmlparser")
+
+
+class MetaCollector:
+    """
+    Tracks only the fields extract_meta needs: <title>, meta description,
+    og:description and the first <h1>/<p>.
+
+    Driven by start/end/data events, so it works both behind html.parser and
+    as an lxml parser target. Check `done` to stop reading early.
+    """
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.meta_description: Optional[str] = None
+        self.og_description: Optional[str] = None
+        self.first_h1: Optional[str] = None
+        self.first_p: Optional[str] = None
+        self.head_closed = False
+        self._capture: Optional[str] = None  # tag whose text is being collected
+        self._depth = 0
+        self._buffer = []
+        self._in_script = False
+
+    # --- Events ---
+    def start(self, tag, attrs):
+        if tag == "meta":
+            self._handle_meta(attrs)
+            return
+
+        if tag in ("script", "style"):
+            self._in_script = True
+            return
+
+        if tag == "body":
+            self.head_closed = True
+
+        if self._capture is not None:
+            if tag == self._capture:
+                if tag == "p":
+                    # An unclosed <p> ends where the next one starts
+                    self._finish_capture()
+                else:
+                    self._depth += 1
+                    return
+            else:
+                return
+
+        if tag == "title" and self.title is None:
+            self._start_capture(tag)
+        elif tag == "h1" and self.first_h1 is None:
+            self._start_capture(tag)
+        elif tag == "p" and self.first_p is None:
+            self._start_capture(tag)
+
+    def end(self, tag):
+        if tag in ("script", "style"):
+            self._in_script = False
+            return
+        if tag == "head":
+            self.head_closed = True
+        if tag == self._capture:
+            if self._depth:
+                self._depth -= 1
+            else:
+                self._finish_capture()
+
+    def data(self, data):
+        if self._capture is not None and not self._in_script:
+            self._buffer.append(data)
+
+    def close(self):
+        # Accept a trailing unclosed <p>/<h1> at end of input
+        if self._capture in ("h1", "p"):
+            self._finish_capture()
+
+    # --- Helpers ---
+    def _handle_meta(self, attrs):
+        content = attrs.get("content")
+        if not content:
+            return
+        if (attrs.get("name") or "").lower() == "description" and self.meta_description is None:
+            self.meta_description = content.strip()
+        elif (attrs.get("property") or "").lower() == "og:description" and self.og_description is None:
+            self.og_description = content.strip()
+
+    def _start_capture(self, tag):
+        self._capture = tag
+        self._depth = 0
+        self._buffer = []
+
+    def _finish_capture(self):
+        text = "".join(self._buffer).strip()
+        if self._capture == "title":
+            self.title = text
+        elif self._capture == "h1":
+            self.first_h1 = text
+        elif self._capture == "p":
+            self.first_p = text
+        self._capture = None
+        self._buffer = []
+
+    # --- Results ---
+    @property
+    def done(self) -> bool:
+        """True once more input cannot change the extracted title/description."""
+        has_title = bool(self.title) or self.first_h1 is not None
+        if self.meta_description:
+            has_description = True
+        elif self.head_closed:
+            has_description = bool(self.og_description) or self.first_p is not None
+        else:
+            has_description = False
+        return has_title and has_description
+
+    def meta(self) -> Tuple[str, str]:
+        """Return (title, description) using the same fallbacks as extract_meta."""
+        title = "No Title"
+        if self.title:
+            title = self.title
+        elif self.first_h1 is not None:
+            title = self.first_h1
+
+        description = "No Description"
+        if self.meta_description:
+            description = self.meta_description
+        elif self.og_description:
+            description = self.og_description
+        elif self.first_p is not None:
+            description = self.first_p[:160] + "..."
+
+        return title, description
+
+    def fields(self) -> Dict[str, Optional[str]]:
+        """Raw extracted fields, mainly for debugging."""
+        return {
+            "title": self.title,
+            "meta_description": self.meta_description,
+            "og_description": self.og_description,
+            "first_h1": self.first_h1,
+            "first_p": self.first_p,
+        }
+
+
+# --- Backends ---
+# Every backend exposes feed(text), close(), `done` and meta().
+
+class MetaParser(HTMLParser):
+    """Lightweight incremental backend built on the stdlib html.parser."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.collector = MetaCollector()
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+        if tag != "meta":
+            self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+    def close(self):
+        super().close()
+        self.collector.close()
+
+    @property
+    def done(self) -> bool:
+        return self.collector.done
+
+    def meta(self) -> Tuple[str, str]:
+        return self.collector.meta()
+
+
+class LxmlMetaParser:
+    """Incremental backend using libxml2's HTML parser with a MetaCollector target."""
+
+    def __init__(self):
+        if lxml_etree is None:
+            raise ImportError("lxml is not installed")
+        self.collector = MetaCollector()
+        self._parser = lxml_etree.HTMLParser(target=self.collector)
+
+    def feed(self, text: str):
+        self._parser.feed(text)
+
+    def close(self):
+        try:
+            self._parser.close()
+        except lxml_etree.XMLSyntaxError:
+            # Raised for empty documents; keep whatever was collected
+            self.collector.close()
+
+    @property
+    def done(self) -> bool:
+        return self.collector.done
+
+    def meta(self) -> Tuple[str, str]:
+        return self.collector.meta()
+
+
+class SoupMetaParser:
+    """Full-document BeautifulSoup backend; buffers input and parses on close()."""
+
+    done = False
+
+    def __init__(self):
+        self._chunks = []
+        self._meta = ("No Title", "No Description")
+
+    def feed(self, text: str):
+        self._chunks.append(text)
+
+    def close(self):
+        self._meta = parse_meta_soup("".join(self._chunks))
+        self._chunks = []
+
+    def meta(self) -> Tuple[str, str]:
+        return self._meta
+
+
+PARSER_BACKENDS = {
+    "htmlparser": MetaParser,
+    "lxml": LxmlMetaParser,
+    "bs4": SoupMetaParser,
+}
+_lxml_fallback_logged = False
+
+def available_backends() -> List[str]:
+    """Names of the parser backends usable in this environment."""
+    return [name for name in PARSER_BACKENDS if name != "lxml" or lxml_etree is not None]
+
+def create_parser(backend: str = PARSER_BACKEND):
+    """
+    Create an incremental meta parser for the given backend.
+    Falls back to the html.parser backend if lxml is requested but missing.
+    """
+    global _lxml_fallback_logged
+
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{backend}'. Choose from: {', '.join(PARSER_BACKENDS)}")
+    if backend == "lxml" and lxml_etree is None:
+        if not _lxml_fallback_logged:
+            _lxml_fallback_logged = True  # once per process, not once per URL
+            logger.warning("lxml not installed, falling back to html.parser backend")
+        backend = "htmlparser"
+    return PARSER_BACKENDS[backend]()
+
+@timed("parse")
+def parse_meta(html: str, backend: str = PARSER_BACKEND) -> Tuple[str, str]:
+    """Extract (title, description) from a complete HTML document."""
+    parser = create_parser(backend)
+    parser.feed(html)
+    parser.close()
+    return parser.meta()
+
+def parse_meta_soup(html: str) -> Tuple[str, str]:
+    """Extract (title, description) from a full HTML document with BeautifulSoup."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Extract title
+    title = "No Title"
+    if soup.title and soup.title.string:
+        title = soup.title.string.strip()
+    elif soup.find("h1"):
+        title = soup.find("h1").get_text().strip()
+
+    # Extract description with fallbacks
+    description = "No Description"
+
+    # Try meta description
+    desc_tag = soup.find("meta", attrs={"name": "description"})
+    if desc_tag and desc_tag.get('content'):
+        description = desc_tag['content'].strip()
+    else:
+        # Try Open Graph description
+        og_desc = soup.find("meta", attrs={"property": "og:description"})
+        if og_desc and og_desc.get('content'):
+            description = og_desc['content'].strip()
+        else:
+            # Fallback to first paragraph
+            first_p = soup.find("p")
+            if first_p:
+                description = first_p.get_text().strip()[:160] + "..."
+
+    return title, description
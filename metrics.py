@@ -0,0 +1,295 @@
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Config ---
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"  # 0 leaves decorated functions unwrapped
+METRICS_PREFIX = "seo_blog"
+
+# Seconds; spans a cached lookup up to a long Gemini generation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    A named metric family with fixed label names, in the Prometheus text format.
+    labels(*values) returns the child for one label combination; look it up
+    once and keep it on hot paths.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _Value:
+    """Counter or gauge value for one label combination."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+    def render(self, name: str, labelnames: Tuple[str, ...], key: Tuple[str, ...]) -> List[str]:
+        return [f"{name}{_label_text(labelnames, key)} {_format_value(self.value)}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+
+class _HistogramValue:
+    """Bucket counts, sum and count for one label combination."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name: str, labelnames: Tuple[str, ...], key: Tuple[str, ...]) -> List[str]:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{name}_bucket{_label_text(labelnames, key, le)} {cumulative}")
+        lines.append(f"{name}_sum{_label_text(labelnames, key)} {_format_value(total)}")
+        lines.append(f"{name}_count{_label_text(labelnames, key)} {count}")
+        return lines
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+
+class Registry:
+    """The metrics exposed by one process, plus collectors for values kept elsewhere (cache stats)."""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """`collector()` returns exposition lines appended to every render()."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+# --- Shared instance ---
+registry = Registry()
+
+STAGE_DURATION = registry.register(Histogram(
+    f"{METRICS_PREFIX}_stage_duration_seconds", "Time spent in each pipeline stage.", ("stage",)
+))
+STAGE_CALLS = registry.register(Counter(
+    f"{METRICS_PREFIX}_stage_calls_total", "Pipeline stage calls by outcome (success or failure).", ("stage", "outcome")
+))
+STAGE_IN_FLIGHT = registry.register(Gauge(
+    f"{METRICS_PREFIX}_stage_in_flight", "Pipeline stage calls currently running.", ("stage",)
+))
+HTTP_DURATION = registry.register(Histogram(
+    f"{METRICS_PREFIX}_http_request_duration_seconds", "Flask request handling time (streams: until the first byte).",
+    ("endpoint", "method", "status")
+))
+
+
+def timed(stage: str, failed: Optional[Callable[[Any], bool]] = None):
+    """
+    Decorator recording a stage's duration, outcome and in-flight count.
+
+    Calls that raise count as failures; `failed(result)` marks returned
+    results as failures for functions that report errors in their return
+    value. Generator functions are timed from the first item to exhaustion.
+    With METRICS_ENABLED=0 the function is returned unwrapped.
+    """
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        duration = STAGE_DURATION.labels(stage)
+        in_flight = STAGE_IN_FLIGHT.labels(stage)
+        successes = STAGE_CALLS.labels(stage, "success")
+        failures = STAGE_CALLS.labels(stage, "failure")
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                in_flight.inc()
+                start = time.perf_counter()
+                ok = False
+                try:
+                    yield from func(*args, **kwargs)
+                    ok = True
+                except GeneratorExit:
+                    ok = True  # the consumer stopped early
+                    raise
+                finally:
+                    duration.observe(time.perf_counter() - start)
+                    in_flight.dec()
+                    (successes if ok else failures).inc()
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            in_flight.inc()
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                failures.inc()
+                raise
+            finally:
+                duration.observe(time.perf_counter() - start)
+                in_flight.dec()
+            (failures if failed is not None and failed(result) else successes).inc()
+            return result
+        return wrapper
+    return decorator
+
+def record_stage(stage: str, seconds: float, failed: bool = False):
+    """
+    Record one call of `stage` timed by the caller, for work that timed()
+    cannot wrap on its own (such as parsing interleaved with network reads).
+    """
+    if not METRICS_ENABLED:
+        return
+    STAGE_DURATION.labels(stage).observe(seconds)
+    STAGE_CALLS.labels(stage, "failure" if failed else "success").inc()
+
+def stats_lines(family: str, label: str, sources: Dict[str, Dict[str, Any]],
+                counters: Iterable[str] = ()) -> List[str]:
+    """
+    Expose numeric stats() dictionaries: one family per stat name, labelled
+    by source, e.g. seo_blog_cache_hits_total{cache="serp"}. Stats named in
+    `counters` only ever increase and are exported as counters with a _total
+    suffix; the rest (sizes, rates) are gauges.
+    """
+    counters = set(counters)
+    values: Dict[str, List[Tuple[str, float]]] = {}
+    for source, stats in sources.items():
+        for stat, value in stats.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                values.setdefault(stat, []).append((source, value))
+    lines = []
+    for stat, samples in sorted(values.items()):
+        name = f"{METRICS_PREFIX}_{family}_{stat}"
+        if stat in counters:
+            name += "_total"
+            lines.append(f"# TYPE {name} counter")
+        else:
+            lines.append(f"# TYPE {name} gauge")
+        for source, value in samples:
+            lines.append(f"{name}{_label_text((label,), (source,))} {_format_value(value)}")
+    return lines
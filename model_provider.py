@@ -0,0 +1,157 @@
+import hashlib
+from abc import ABC, abstractmethod
+import os
+import random
+import threading
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+import google.generativeai as genai
+from google.api_core.exceptions import ResourceExhausted
+from dotenv import load_dotenv
+from context_cache import get_context_cache
+
+load_dotenv()
+
+# --- Config ---
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "gemini")  # gemini | stub
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+# Offline stub behaviour
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0.5"))  # seconds before the first chunk
+STUB_CHUNK_DELAY = float(os.getenv("STUB_CHUNK_DELAY", "0.02"))  # seconds between chunks
+STUB_CHUNK_CHARS = int(os.getenv("STUB_CHUNK_CHARS", "200"))
+STUB_OUTPUT_CHARS = int(os.getenv("STUB_OUTPUT_CHARS", "8000"))  # length of a generated blog
+STUB_QUOTA_ERROR_RATE = float(os.getenv("STUB_QUOTA_ERROR_RATE", "0"))  # fraction of calls failing with 429
+STUB_SEED = int(os.getenv("STUB_SEED", "0"))
+
+
+class ModelProvider(ABC):
+    """
+    The text-generation interface the blog and SEO generators rely on.
+
+    generate_content() mirrors google.generativeai.GenerativeModel: it returns
+    a response with `.text`, or an iterator of chunks with `.text` when
+    `stream=True`, and raises on API errors.
+    """
+
+    name = "base"
+    model_name = ""
+
+    @abstractmethod
+    def generate_content(self, contents: Any, generation_config: Any = None, stream: bool = False):
+        """Generate text for `contents`, as GenerativeModel.generate_content does."""
+
+    def bind_prefix(self, system_instruction: str, request: str, text: str) -> Tuple[Any, Any]:
+        """
+        Return (model to call, contents) for a prompt made of a static prefix
+        and a per-request suffix; `text` is the same prompt as one string.
+        Providers without prefix caching send `text`.
+        """
+        return self, text
+
+
+class GeminiProvider(ModelProvider):
+    """Google Gemini through google.generativeai, with context-cached prefixes."""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = GEMINI_MODEL_NAME):
+        self.model = genai.GenerativeModel(model_name)
+        self.model_name = self.model.model_name
+
+    def generate_content(self, contents: Any, generation_config: Any = None, stream: bool = False):
+        return self.model.generate_content(contents, generation_config=generation_config, stream=stream)
+
+    def bind_prefix(self, system_instruction: str, request: str, text: str) -> Tuple[Any, Any]:
+        return get_context_cache().bind(self.model, system_instruction, request, text)
+
+
+class StubResponse:
+    """A generated text (or one streamed chunk of it)."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubProvider(ModelProvider):
+    """
+    Offline stand-in for load testing and local development.
+
+    Output is deterministic for a given prompt and seed. Calls wait `latency`
+    seconds before the first chunk and `chunk_delay` between chunks of
+    `chunk_chars` characters. A `quota_error_rate` fraction of calls raise
+    ResourceExhausted, like a Gemini 429, before producing any output.
+    """
+
+    name = "stub"
+    model_name = "stub"
+
+    def __init__(self, latency: float = STUB_LATENCY, chunk_delay: float = STUB_CHUNK_DELAY,
+                 chunk_chars: int = STUB_CHUNK_CHARS, output_chars: int = STUB_OUTPUT_CHARS,
+                 quota_error_rate: float = STUB_QUOTA_ERROR_RATE, seed: int = STUB_SEED):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunk_chars = max(1, chunk_chars)
+        self.output_chars = output_chars
+        self.quota_error_rate = quota_error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.quota_errors = 0
+
+    def generate_content(self, contents: Any, generation_config: Any = None, stream: bool = False):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.quota_error_rate
+            if fail:
+                self.quota_errors += 1
+        prompt = contents if isinstance(contents, str) else str(contents)
+        chunks = self._chunks(self._text_for(prompt))
+
+        if stream:
+            return self._stream(chunks, fail)
+        time.sleep(self.latency + self.chunk_delay * (len(chunks) - 1))
+        if fail:
+            raise ResourceExhausted("429 Resource has been exhausted (stub quota error)")
+        return StubResponse("".join(chunks))
+
+    def _stream(self, chunks: List[str], fail: bool) -> Iterator[StubResponse]:
+        time.sleep(self.latency)
+        if fail:
+            raise ResourceExhausted("429 Resource has been exhausted (stub quota error)")
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(self.chunk_delay)
+            yield StubResponse(chunk)
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+    def _text_for(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        if "URL Slug" in prompt:
+            # SEO suggestion prompt
+            return "".join(
+                f"<h4>Option {i}</h4><ul><li><strong>URL Slug:</strong> <code>stub-{digest}-{i}</code></li>"
+                f"<li><strong>Meta Title:</strong> Stub title {digest} {i}</li>"
+                f"<li><strong>Meta Description:</strong> Stub description {digest} {i}.</li></ul>"
+                for i in range(1, 4)
+            )
+        paragraph = f"<p>Stub paragraph for prompt {digest}. " + "Lorem ipsum dolor sit amet. " * 10 + "</p>"
+        body = f"<h1>Stub blog {digest}</h1>"
+        while len(body) < self.output_chars:
+            body += paragraph
+        return body[:self.output_chars]
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "stub": StubProvider,
+}
+
+def get_model(backend: Optional[str] = None) -> ModelProvider:
+    """Create the model provider for `backend` (default: the MODEL_BACKEND setting)."""
+    backend = (backend or MODEL_BACKEND).lower()
+    if backend not in PROVIDERS:
+        raise ValueError(f"Unknown MODEL_BACKEND '{backend}'. Choose from: {', '.join(PROVIDERS)}")
+    return PROVIDERS[backend]()
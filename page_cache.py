@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Hashable, NamedTuple
+from cachetools import LRUCache
+from flask import Request, Response
+from dotenv import load_dotenv
+from shared import Counters, Lazy, rate
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; pages are served gzip-only without it
+    brotli = None
+
+load_dotenv()
+
+# --- Config ---
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1") == "1"
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "256"))  # rendered pages kept in process
+PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", str(24 * 3600)))  # Cache-Control max-age in seconds
+PAGE_COMPRESS_MIN_BYTES = int(os.getenv("PAGE_COMPRESS_MIN_BYTES", "1024"))  # smaller pages are sent as is
+
+ENCODING_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+
+
+class RenderedPage(NamedTuple):
+    """A rendered HTML page with its strong ETag and precompressed bodies."""
+    etag: str
+    body: bytes
+    encoded: Dict[str, bytes]  # content-coding -> compressed body
+
+def compress_page(html: str, min_bytes: int = PAGE_COMPRESS_MIN_BYTES) -> RenderedPage:
+    """Encode, hash and compress a page once. Encodings that do not shrink it are dropped."""
+    body = html.encode("utf-8")
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    encoded = {}
+    if len(body) >= min_bytes:
+        if brotli is not None:
+            encoded["br"] = brotli.compress(body, quality=11, mode=brotli.MODE_TEXT)
+        encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        encoded = {coding: data for coding, data in encoded.items() if len(data) < len(body)}
+    return RenderedPage(etag, body, encoded)
+
+
+class PageCache:
+    """
+    In-process LRU of rendered, precompressed pages.
+
+    Callers key pages by everything that changes the output (for blogs: the
+    artifact filename and its stored version), so entries never need
+    invalidating; stale versions just age out of the LRU.
+    """
+
+    COUNTERS = ("hits", "misses", "not_modified")  # stats() keys that only increase
+
+    def __init__(self, max_entries: int = PAGE_CACHE_SIZE, max_age: int = PAGE_CACHE_MAX_AGE,
+                 enabled: bool = PAGE_CACHE_ENABLED):
+        self.max_age = max_age
+        self.enabled = enabled
+        self._pages = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+        self._counters = Counters(self.COUNTERS)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> RenderedPage:
+        """The cached page for `key`, rendering and compressing it on a miss."""
+        if self.enabled:
+            with self._lock:
+                page = self._pages.get(key)
+            self._counters.inc("hits" if page is not None else "misses")
+            if page is not None:
+                return page
+        # Render outside the lock; two concurrent misses just render twice
+        page = compress_page(render())
+        if self.enabled:
+            with self._lock:
+                self._pages[key] = page
+        return page
+
+    def respond(self, page: RenderedPage, request: Request) -> Response:
+        """
+        Build the response for `page`: the best encoding the client accepts,
+        a strong ETag per representation, Cache-Control, and a 304 when
+        If-None-Match already matches.
+        """
+        coding = request.accept_encodings.best_match(list(page.encoded) + ["identity"], default="identity")
+        body = page.encoded.get(coding, page.body)
+        response = Response(body, mimetype="text/html")
+        if coding in page.encoded:
+            response.headers["Content-Encoding"] = coding
+            response.set_etag(page.etag + ENCODING_SUFFIXES[coding])
+        else:
+            response.set_etag(page.etag)
+        response.headers["Vary"] = "Accept-Encoding"
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            self._counters.inc("not_modified")
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since process start."""
+        stats = self._counters.snapshot()
+        with self._lock:
+            stats["entries"] = len(self._pages)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = rate(stats["hits"], lookups)
+        stats["brotli"] = brotli is not None
+        return stats
+
+
+# --- Shared instance ---
+_cache = Lazy(PageCache)
+
+def get_page_cache() -> PageCache:
+    """Return the process-wide rendered page cache, creating it on first use."""
+    return _cache.get()
@@ -0,0 +1,107 @@
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+from dotenv import load_dotenv
+from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# --- Config ---
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "15"))  # requests per minute quota
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "1000000"))  # tokens per minute quota
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "2"))  # seconds
+RETRY_MAX_DELAY = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "60"))  # seconds
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Tokens refill continuously at `rate` per second
+    up to `capacity`; acquire() blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Take `tokens` from the bucket, waiting if needed. Returns False on timeout."""
+        tokens = min(tokens, self.capacity)  # an oversized request still gets through eventually
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class GeminiRateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for Gemini calls."""
+
+    def __init__(self, rpm: float = GEMINI_RPM, tpm: float = GEMINI_TPM):
+        # Capacity of one minute's quota would allow a full-minute burst at start;
+        # a smaller burst spreads calls out evenly instead.
+        self.requests = TokenBucket(rpm / 60.0, max(1.0, rpm / 10.0))
+        self.tokens = TokenBucket(tpm / 60.0, tpm)
+
+    def acquire(self, estimated_tokens: int = 0):
+        """Block until one request and `estimated_tokens` tokens fit in the quotas."""
+        self.requests.acquire(1)
+        if estimated_tokens:
+            self.tokens.acquire(estimated_tokens)
+
+
+def estimate_tokens(prompt: str, max_output_tokens: int = 0) -> int:
+    """Rough token estimate (about 4 characters per token) for quota accounting."""
+    return len(prompt) // 4 + max_output_tokens
+
+def is_quota_error(exc: Exception) -> bool:
+    """True for rate-limit / quota errors worth retrying."""
+    if isinstance(exc, (ResourceExhausted, TooManyRequests)):
+        return True
+    if getattr(exc, "code", None) == 429:
+        return True
+    message = str(exc).lower()
+    return "429" in message or "quota" in message or "resource exhausted" in message
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """Exponential backoff with full jitter for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def call_with_retries(fn: Callable[[], T], max_retries: int = GEMINI_MAX_RETRIES,
+                      base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY) -> T:
+    """Call `fn`, retrying quota errors with exponential backoff and jitter."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_quota_error(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning("Quota error (%.60s), retrying in %.1fs (%d/%d)", e, delay, attempt + 1, max_retries)
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, Optional
+from cachetools import LRUCache
+from dotenv import load_dotenv
+from shared import Counters, Lazy, connect_sqlite, init_sqlite, rate
+
+load_dotenv()
+
+# --- Config ---
+SEO_CACHE_ENABLED = os.getenv("SEO_CACHE_ENABLED", "1") == "1"
+SEO_CACHE_PATH = os.getenv("SEO_CACHE_PATH", ".cache/seo_cache.db")
+SEO_CACHE_TTL = int(os.getenv("SEO_CACHE_TTL", str(7 * 24 * 3600)))  # seconds suggestions are reused
+SEO_CACHE_MEMORY_SIZE = int(os.getenv("SEO_CACHE_MEMORY_SIZE", "256"))  # entries kept in process
+SEO_CACHE_MAX_ENTRIES = int(os.getenv("SEO_CACHE_MAX_ENTRIES", "5000"))  # rows kept on disk
+
+
+class SeoCache:
+    """
+    Two-level cache of generated SEO suggestion HTML.
+
+    Keys hash everything that determines the model call: the content prefix
+    the prompt uses, the number of options, the model and its generation
+    config. Lookups try an in-process LRU first, then SQLite, so entries
+    survive restarts and are shared between worker processes. Entries expire
+    after `ttl` seconds and the table keeps the `max_entries` most recently
+    used rows.
+    """
+
+    COUNTERS = ("memory_hits", "disk_hits", "misses", "bypassed", "stores")  # stats() keys that only increase
+
+    def __init__(self, path: str = SEO_CACHE_PATH, ttl: int = SEO_CACHE_TTL,
+                 memory_size: int = SEO_CACHE_MEMORY_SIZE, max_entries: int = SEO_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = LRUCache(maxsize=memory_size)
+        self._lock = threading.Lock()
+        self._counters = Counters(self.COUNTERS)
+
+        init_sqlite(path, self._connect, """
+            CREATE TABLE IF NOT EXISTS seo_suggestions (
+                cache_key TEXT PRIMARY KEY,
+                html TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_seo_suggestions_last_access ON seo_suggestions (last_access);
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect_sqlite(self.path)
+
+    @staticmethod
+    def make_key(content: str, num_options: int, model_name: str, generation_config: Dict[str, Any]) -> str:
+        payload = json.dumps([content, int(num_options), model_name, generation_config], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached suggestion HTML for a key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None and now - entry[1] <= self.ttl:
+            self._counters.inc("memory_hits")
+            return entry[0]
+
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT html, created_at FROM seo_suggestions WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl:
+                conn.execute("UPDATE seo_suggestions SET last_access = ? WHERE cache_key = ?", (now, key))
+
+        if row is None or now - row[1] > self.ttl:
+            self._counters.inc("misses")
+            return None
+        with self._lock:
+            self._memory[key] = (row[0], row[1])
+        self._counters.inc("disk_hits")
+        return row[0]
+
+    def set(self, key: str, html: str):
+        now = time.time()
+        with self._lock:
+            self._memory[key] = (html, now)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO seo_suggestions (cache_key, html, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, html, now, now),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM seo_suggestions").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM seo_suggestions WHERE cache_key IN "
+                    "(SELECT cache_key FROM seo_suggestions ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+        self._counters.inc("stores")
+
+    def record_bypass(self):
+        """Count a lookup skipped because the caller asked for fresh suggestions."""
+        self._counters.inc("bypassed")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM seo_suggestions")
+
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since process start."""
+        stats = self._counters.snapshot()
+        with self._lock:
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = rate(hits, lookups)
+        return stats
+
+
+# --- Shared instance ---
+_cache = Lazy(SeoCache)
+
+def get_seo_cache() -> SeoCache:
+    """Return the process-wide SEO suggestion cache, creating it on first use."""
+    return _cache.get()
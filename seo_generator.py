@@ -1,11 +1,51 @@
+import logging
 import google.generativeai as genai
 from typing import List, Dict
+from seo_cache import SEO_CACHE_ENABLED, SeoCache, get_seo_cache
+from metrics import timed
 
-def generate_seo_suggestions(blog_content: str, model, num_options: int = 3) -> str:
+logger = logging.getLogger(__name__)
+
+# Characters of blog content the prompt is built from
+SEO_CONTENT_CHARS = 1000
+SEO_GENERATION_CONFIG = {"temperature": 0.7, "max_output_tokens": 800}
+SEO_ERROR_PREFIX = "<p><strong>Error generating SEO suggestions:</strong>"
+
+@timed("seo_generate")
+def request_seo_suggestions(model, prompt: str):
+    """The model call behind generate_seo_suggestions; timed on its own so cache hits stay out of seo_generate."""
+    return model.generate_content(
+        prompt,
+        generation_config=genai.types.GenerationConfig(**SEO_GENERATION_CONFIG)
+    )
+
+def generate_seo_suggestions(blog_content: str, model, num_options: int = 3,
+                             force_fresh: bool = False, use_cache: bool = SEO_CACHE_ENABLED) -> str:
     """
     Generate SEO suggestions (slug, meta title, meta description) for given blog content.
     Returns HTML formatted suggestions.
+
+    Suggestions are cached by the content prefix, num_options, model and
+    generation config, so repeated requests for the same blog reuse the
+    earlier answer. `force_fresh` skips the lookup and replaces the entry.
     """
+    content = blog_content[:SEO_CONTENT_CHARS]
+    key = None
+    if use_cache:
+        model_name = getattr(model, "model_name", type(model).__name__)
+        key = SeoCache.make_key(content, num_options, model_name, SEO_GENERATION_CONFIG)
+        # Like the write below, a failed lookup is a miss rather than an error
+        try:
+            cache = get_seo_cache()
+            if force_fresh:
+                cache.record_bypass()
+            else:
+                cached = cache.get(key)
+                if cached is not None:
+                    return cached
+        except Exception as e:
+            logger.warning("SEO cache lookup failed: %s", e)
+
     prompt = f"""
     Based on the following blog content, suggest {num_options} SEO-optimized options.
     For each option, provide:
@@ -14,7 +54,7 @@ def generate_seo_suggestions(blog_content: str, model, num_options: int = 3) ->
     - Meta Description (under 160 characters, engaging with call-to-action)
 
     Blog content:
-    {blog_content[:1000]}...
+    {content}...
 
     Format your response as clean HTML using only these tags: <h4>, <p>, <strong>, <ul>, <li>, <code>
     Structure each option clearly with:
@@ -33,13 +73,7 @@ def generate_seo_suggestions(blog_content: str, model, num_options: int = 3) ->
     """
 
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=800,
-            )
-        )
+        response = request_seo_suggestions(model, prompt)
 
         if not response.text:
             return "<p>No SEO suggestions could be generated.</p>"
@@ -49,8 +83,15 @@ def generate_seo_suggestions(blog_content: str, model, num_options: int = 3) ->
         
         # Remove any markdown code fences if they appear
         seo_html = seo_html.replace("```html", "").replace("```", "").strip()
-        
-        return seo_html
 
     except Exception as e:
-        return f"<p><strong>Error generating SEO suggestions:</strong> {str(e)}</p>"
\ No newline at end of file
+        return f"{SEO_ERROR_PREFIX} {str(e)}</p>"
+
+    # Only real suggestions are cached; errors are retried next time.
+    # A failed cache write must not discard suggestions that were generated.
+    if key is not None:
+        try:
+            get_seo_cache().set(key, seo_html)
+        except Exception as e:
+            logger.warning("SEO cache write failed: %s", e)
+    return seo_html
\ No newline at end of file
@@ -1,41 +1,85 @@
-import json
-from typing import List, Dict
+import itertools
+import logging
+import threading
+from typing import Any, Callable, List, Dict, Optional
 import time
 from serp_crawl import get_serp_results
-from meta_extraction import extract_meta
+from meta_extraction import extract_meta_batch, MAX_WORKERS
+from artifacts import write_json_atomic
+from log_config import setup_logging
+
+logger = logging.getLogger(__name__)
 
 def save_results_to_file(results: List[Dict], filename: str = "seo_research_results.json"):
     """Save results to a JSON file for later analysis."""
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
-        print(f"\n✓ Results saved to {filename}")
+        write_json_atomic(filename, results, indent=True)
+        logger.info("Results saved to %s", filename)
     except Exception as e:
-        print(f"✗ Error saving results: {e}")
+        logger.error("Error saving results: %s", e)
+
+def log_summary(seed_keyword: str, results: List[Dict], successful_extractions: int):
+    """Log the research summary, plus every successful result at DEBUG."""
+    total_urls = len(results)
+    success_rate = f"{successful_extractions / total_urls * 100:.1f}%" if total_urls > 0 else "N/A"
+    logger.info("Research summary for '%s': %d URLs, %d successful extractions (%s)",
+                seed_keyword, total_urls, successful_extractions, success_rate)
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        for item in results:
+            if item['status'] == 'success':
+                logger.debug("Rank #%d: %s | %s | %.100s", item['rank'], item['url'], item['title'], item['description'])
 
-def main(seed_keyword: str, num_results: int = 10, search_type: str = "competitor") -> List[Dict]:
-    """Main function to research a single keyword and extract meta data."""
-    print(f"\nStarting SEO research for: '{seed_keyword}'")
-    print("=" * 60)
+def main(seed_keyword: str, num_results: int = 10, search_type: str = "competitor",
+         max_workers: int = MAX_WORKERS, save_to_file: bool = True,
+         cancel_event: Optional[threading.Event] = None,
+         progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> List[Dict]:
+    """
+    Main function to research a single keyword and extract meta data.
+    URLs are fetched concurrently with at most `max_workers` requests in flight.
+    Setting `cancel_event` stops the run early with the results gathered so far.
+    `progress_callback(event, data)` receives a "serp" event once the URLs are
+    known and a "url" event as each URL's extraction finishes.
+    With `save_to_file` the results also go to seo_research_results.json.
+    """
+    logger.info("Starting SEO research for '%s'", seed_keyword)
     
     all_results = []
     successful_extractions = 0
     total_urls = 0
     
-    print(f"\nStep 1: Getting search results for '{seed_keyword}'...")
+    logger.debug("Step 1: getting search results for '%s'", seed_keyword)
     urls = get_serp_results(seed_keyword, num_results=num_results, search_type=search_type)
     
     if not urls:
-        print(f"  ✗ No URLs found for '{seed_keyword}'")
+        logger.warning("No URLs found for '%s'", seed_keyword)
         return []
-        
-    print(f"✓ Found {len(urls)} URLs for '{seed_keyword}'")
     
-    print(f"\nStep 2: Extracting meta data from {len(urls)} URLs...")
-    for j, url in enumerate(urls, 1):
+    if progress_callback is not None:
+        progress_callback('serp', {'keyword': seed_keyword, 'total': len(urls)})
+    
+    if cancel_event is not None and cancel_event.is_set():
+        logger.info("Research for '%s' cancelled", seed_keyword)
+        return []
+    
+    logger.debug("Step 2: extracting meta data from %d URLs", len(urls))
+    completed = itertools.count(1)  # next() is atomic across worker threads
+    
+    def report_url(index, meta):
+        progress_callback('url', {
+            'rank': index + 1,
+            'url': meta['url'],
+            'title': meta['title'],
+            'status': meta['status'],
+            'completed': next(completed),
+            'total': len(urls)
+        })
+    
+    on_result = report_url if progress_callback is not None else None
+    metas = extract_meta_batch(urls, max_workers=max_workers, cancel_event=cancel_event, on_result=on_result)
+    for j, meta in enumerate(metas, 1):
         total_urls += 1
         
-        meta = extract_meta(url)
         meta['keyword'] = seed_keyword  # Add the search keyword
         meta['rank'] = j  # Add ranking position
         all_results.append(meta)
@@ -43,39 +87,21 @@ def main(seed_keyword: str, num_results: int = 10, search_type: str = "competito
         if meta['status'] == 'success':
             successful_extractions += 1
     
-    # Display results summary
-    print("\n" + "=" * 60)
-    print("RESEARCH SUMMARY")
-    print("=" * 60)
-    print(f"Keyword: '{seed_keyword}'")
-    print(f"Total URLs found: {total_urls}")
-    print(f"Successful extractions: {successful_extractions}")
-    print(f"Success rate: {(successful_extractions/total_urls*100):.1f}%" if total_urls > 0 else "N/A")
-    
-    # Display successful results
-    if successful_extractions > 0:
-        print("\nSUCCESSFUL EXTRACTIONS")
-        print("-" * 40)
-        for item in all_results:
-            if item['status'] == 'success':
-                print(f"\n Rank #{item['rank']}")
-                print(f"   URL: {item['url']}")
-                print(f"   Title: {item['title']}")
-                print(f"   Description: {item['description'][:100]}...")
-    else:
-        print("\n No successful extractions found.")
-        print("This might be due to:")
-        print("- Network connectivity issues")
-        print("- Websites blocking automated requests")
-        print("- Invalid URLs in search results")
+    # The summary is only built when someone will see it
+    if logger.isEnabledFor(logging.INFO):
+        log_summary(seed_keyword, all_results, successful_extractions)
+    if successful_extractions == 0:
+        logger.warning("No successful extractions for '%s'. This might be due to network connectivity issues, "
+                       "websites blocking automated requests or invalid URLs in search results", seed_keyword)
     
     # Save results to file
-    if all_results:
+    if all_results and save_to_file:
         save_results_to_file(all_results)
     
     return all_results
 
 if __name__ == "__main__":
+    setup_logging()
     keyword="Python programming"
     try:
         print("🔧 SEO Research Tool Starting...")
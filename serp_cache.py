@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from shared import Counters, Lazy, connect_sqlite, init_sqlite, rate
+
+load_dotenv()
+
+# --- Config ---
+SERP_CACHE_ENABLED = os.getenv("SERP_CACHE_ENABLED", "1") == "1"
+SERP_CACHE_PATH = os.getenv("SERP_CACHE_PATH", ".cache/serp_cache.db")
+SERP_CACHE_TTL = int(os.getenv("SERP_CACHE_TTL", str(24 * 3600)))  # seconds a result is fresh
+SERP_CACHE_STALE_TTL = int(os.getenv("SERP_CACHE_STALE_TTL", str(7 * 24 * 3600)))  # extra seconds a stale result may be served
+
+
+class SerpCache:
+    """
+    On-disk SQLite cache for SERP URL lists keyed by (query, cx, num_results).
+
+    Fresh entries are returned directly. Entries past their TTL but inside the
+    stale window are returned immediately while a background thread refreshes
+    them (stale-while-revalidate). Anything older is a miss.
+    """
+
+    COUNTERS = ("hits", "stale_hits", "misses", "refreshes", "refresh_errors")  # stats() keys that only increase
+
+    def __init__(self, path: str = SERP_CACHE_PATH, ttl: int = SERP_CACHE_TTL,
+                 stale_ttl: int = SERP_CACHE_STALE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._counters = Counters(self.COUNTERS)
+
+        init_sqlite(path, self._connect, """
+            CREATE TABLE IF NOT EXISTS serp_results (
+                cache_key TEXT PRIMARY KEY,
+                urls TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect_sqlite(self.path)
+
+    @staticmethod
+    def make_key(query: str, cx: Optional[str], num_results: int) -> str:
+        return json.dumps([query.strip().lower(), cx or "", int(num_results)])
+
+    def get(self, key: str) -> Optional[Tuple[List[str], float]]:
+        """Return (urls, age_in_seconds) for a cached key, or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT urls, fetched_at FROM serp_results WHERE cache_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), time.time() - row[1]
+
+    def set(self, key: str, urls: List[str]):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO serp_results (cache_key, urls, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(urls), time.time()),
+            )
+
+    def get_or_fetch(self, query: str, cx: Optional[str], num_results: int,
+                     fetch: Callable[[], List[str]]) -> List[str]:
+        """
+        Return cached URLs for the query, calling `fetch` on a miss.
+        Empty results are not cached so transient API failures are retried.
+        """
+        key = self.make_key(query, cx, num_results)
+        cached = self.get(key)
+
+        if cached is not None:
+            urls, age = cached
+            if age <= self.ttl:
+                self._counters.inc("hits")
+                return urls
+            if age <= self.ttl + self.stale_ttl:
+                self._counters.inc("stale_hits")
+                self._refresh_in_background(key, fetch)
+                return urls
+
+        self._counters.inc("misses")
+        urls = fetch()
+        if urls:
+            self.set(key, urls)
+        return urls
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], List[str]]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                urls = fetch()
+                if urls:
+                    self.set(key, urls)
+                self._counters.inc("refreshes")
+            except Exception:
+                self._counters.inc("refresh_errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        thread.start()
+
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since process start."""
+        stats = self._counters.snapshot()
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = rate(stats["hits"] + stats["stale_hits"], lookups)
+        return stats
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM serp_results")
+
+
+# --- Shared instance ---
+_cache = Lazy(SerpCache)
+
+def get_serp_cache() -> SerpCache:
+    """Return the process-wide SERP cache, creating it on first use."""
+    return _cache.get()
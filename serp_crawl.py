@@ -1,17 +1,43 @@
-from typing import List
-from googleapiclient.discovery import build
+from typing import List, Optional
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from dotenv import load_dotenv
 from urllib.parse import urlparse
 import os
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from serp_cache import get_serp_cache, SERP_CACHE_ENABLED
+from rate_limit import TokenBucket
+from metrics import timed
+from log_config import in_current_context, setup_logging
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 #use any one according to toggle
 GOOGLE_CX_COMPETITORS = os.getenv("GOOGLE_CX_COMPETITORS")
 GOOGLE_CX_PUBLIC = os.getenv("GOOGLE_CX_PUBLIC")
 
 GOOGLE_SERP = os.getenv("GOOGLE_SERP")
 
+# --- Pagination ---
+PAGE_SIZE = 10  # Custom Search API maximum per request
+MAX_SERP_RESULTS = 100  # API only exposes the first 100 results
+MAX_PAGE_START = MAX_SERP_RESULTS - PAGE_SIZE + 1
+PAGE_WORKERS = int(os.getenv("SERP_PAGE_WORKERS", "4"))
+
+# --- Client cache ---
+# The discovery document is loaded once per process; each thread builds its
+# own client from it because the underlying httplib2.Http is not thread-safe.
+_discovery_doc = None
+_discovery_lock = threading.Lock()
+_thread_local = threading.local()
+# Long-lived pool so page workers keep their per-thread clients between queries
+_page_executor = ThreadPoolExecutor(max_workers=PAGE_WORKERS, thread_name_prefix="serp-page")
+
 def get_domain(url: str) -> str:
     """Extract domain from URL."""
     try:
@@ -23,40 +49,125 @@ def get_domain(url: str) -> str:
     except:
         return url
 
-def get_serp_results(query: str, num_results: int = 10, search_type: str = "competitor") -> List[str]:
+def get_discovery_document():
+    """Return the bundled customsearch v1 discovery document, loaded once per process."""
+    global _discovery_doc
+
+    if _discovery_doc is None:
+        with _discovery_lock:
+            if _discovery_doc is None:
+                _discovery_doc = get_static_doc("customsearch", "v1") or ""
+    return _discovery_doc
+
+def get_search_service():
+    """Return this thread's Custom Search client, building it on first use."""
+    service = getattr(_thread_local, "service", None)
+    if service is None:
+        document = get_discovery_document()
+        if document:
+            service = build_from_document(document, developerKey=GOOGLE_SERP)
+        else:
+            # No bundled document: fall back to a regular (network) discovery build
+            service = build("customsearch", "v1", developerKey=GOOGLE_SERP)
+        _thread_local.service = service
+    return service
+
+@timed("serp_call")
+def fetch_serp_page(query: str, cx: str, start: int, limiter: Optional[TokenBucket] = None) -> List[str]:
     """
-    Get search results using Google Custom Search JSON API with unique domain filtering.
-    You need a Google API key + Custom Search Engine ID (cx).
+    Fetch one page (up to PAGE_SIZE links) of results starting at 1-based rank `start`.
+    Each page is one API request; `limiter` paces them against the query quota.
     """
-    print(f"  Searching Google for: '{query}'")
-    api_key = GOOGLE_SERP   
-    cx = GOOGLE_CX_COMPETITORS if search_type == "competitor" else GOOGLE_CX_PUBLIC  
-    print(f"  Using search type: '{search_type}' with cx: '{cx}'")   
+    if limiter is not None:
+        limiter.acquire()
+    service = get_search_service()
+    # The API rejects requests with start + num > MAX_SERP_RESULTS, so the last page is shorter
+    num = min(PAGE_SIZE, MAX_SERP_RESULTS - start)
+    res = service.cse().list(q=query, cx=cx, num=num, start=start).execute()
+    return [item['link'] for item in res.get('items', [])]
 
-    try:
-        service = build("customsearch", "v1", developerKey=api_key)
-        res = service.cse().list(q=query, cx=cx, num=num_results).execute()
+def search_unique_domains(query: str, cx: str, num_results: int = 10,
+                          limiter: Optional[TokenBucket] = None) -> List[str]:
+    """
+    Run a Custom Search query and keep the first URL for each domain. Raises on API errors.
 
-        urls = []
-        seen_domains = set() 
+    The API returns at most PAGE_SIZE items per request, so pages are fetched
+    concurrently with `start` and merged in rank order. If domain deduplication
+    leaves fewer than `num_results` URLs, further pages are requested.
+    """
+    num_results = min(num_results, MAX_SERP_RESULTS)
+    urls = []
+    seen_domains = set() 
+    next_start = 1
+    exhausted = False
+    
+    while len(urls) < num_results and not exhausted and next_start <= MAX_PAGE_START:
+        pages_needed = math.ceil((num_results - len(urls)) / PAGE_SIZE)
+        starts = [next_start + i * PAGE_SIZE for i in range(pages_needed)]
+        starts = [start for start in starts if start <= MAX_PAGE_START]
+        next_start = starts[-1] + PAGE_SIZE
+        
+        if len(starts) == 1:
+            # A single page (typically the follow-up after deduplication) runs inline
+            fetches = [lambda: fetch_serp_page(query, cx, starts[0], limiter)]
+        else:
+            futures = [_page_executor.submit(in_current_context(fetch_serp_page), query, cx, start, limiter) for start in starts]
+            fetches = [future.result for future in futures]
+        
+        pages = []
+        for fetch_page in fetches:
+            try:
+                pages.append(fetch_page())
+            except Exception as e:
+                if not urls and not pages:
+                    raise
+                # Keep the pages we already have in rank order
+                logger.warning("Error fetching SERP page for '%s': %s", query, e)
+                exhausted = True
+                break
         
-        if 'items' in res:
-            for item in res['items']:
-                url = item['link']
+        for page in pages:
+            for url in page:
                 domain = get_domain(url)
                 
                 if domain not in seen_domains:
                     urls.append(url)
                     seen_domains.add(domain)
+            
+            if len(page) < PAGE_SIZE:
+                # Fewer items than requested means there are no more results
+                exhausted = True
+                break
+    
+    return urls[:num_results]
+
+def get_serp_results(query: str, num_results: int = 10, search_type: str = "competitor",
+                     use_cache: bool = SERP_CACHE_ENABLED, limiter: Optional[TokenBucket] = None) -> List[str]:
+    """
+    Get search results using Google Custom Search JSON API with unique domain filtering.
+    You need a Google API key + Custom Search Engine ID (cx).
+    Results are served from the on-disk SERP cache when available; only
+    requests that reach the API take tokens from `limiter`.
+    """
+    cx = GOOGLE_CX_COMPETITORS if search_type == "competitor" else GOOGLE_CX_PUBLIC  
+    logger.debug("Searching Google for '%s' (search type '%s', cx '%s')", query, search_type, cx)
+
+    try:
+        fetch = lambda: search_unique_domains(query, cx, num_results, limiter)
+        if use_cache:
+            urls = get_serp_cache().get_or_fetch(query, cx, num_results, fetch)
+        else:
+            urls = fetch()
 
-        print(f"  Found {len(urls)} unique domain URLs")
+        logger.info("Found %d unique domain URLs for '%s'", len(urls), query)
         return urls
 
     except Exception as e:
-        print(f"  Error getting Google SERP results for '{query}': {e}")
+        logger.warning("Error getting Google SERP results for '%s': %s", query, e)
         return []
 
 if __name__ == "__main__":
+    setup_logging()
     query = "seo tools"
     results = get_serp_results(query)
     print(f"\nSERP results for '{query}' (unique domains only):")
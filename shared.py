@@ -0,0 +1,84 @@
+"""
+Building blocks shared by the caches and stores: a lazily created
+process-wide instance, SQLite databases set up the same way everywhere, and
+hit/miss counters for stats().
+"""
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# --- Config ---
+SQLITE_TIMEOUT = 30  # seconds a connection waits for another writer's lock
+
+
+class Lazy(Generic[T]):
+    """
+    A process-wide instance built by `factory` on first use.
+
+    get() takes the lock only while the instance does not exist yet, so
+    concurrent first calls build it once and later calls never wait. A
+    factory that raises is tried again on the next call.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    def replace(self, instance: Optional[T]) -> Optional[T]:
+        """Swap in `instance` (None rebuilds it on next use) and return the previous one."""
+        with self._lock:
+            previous, self._instance = self._instance, instance
+        return previous
+
+
+def connect_sqlite(path: str, timeout: float = SQLITE_TIMEOUT, **kwargs) -> sqlite3.Connection:
+    """Open a connection that waits `timeout` seconds for locks held by other threads or processes."""
+    return sqlite3.connect(path, timeout=timeout, **kwargs)
+
+def init_sqlite(path: str, connect: Callable[[], sqlite3.Connection], schema: str):
+    """
+    Prepare a database file: create its directory, switch it to WAL mode (so
+    readers never block the writer) and run `schema`, a script of idempotent
+    CREATE ... IF NOT EXISTS statements.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with closing(connect()) as conn, conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(schema)
+
+
+class Counters:
+    """Thread-safe counters that only increase, such as cache hits and misses since process start."""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = tuple(names)
+        self._values = dict.fromkeys(self.names, 0)
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: int = 1):
+        with self._lock:
+            self._values[name] += amount
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+def rate(part: float, whole: float) -> float:
+    """part / whole, or 0.0 before anything was counted."""
+    return part / whole if whole else 0.0
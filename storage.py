@@ -0,0 +1,308 @@
+"""
+Indexed SQLite storage for research runs and generated blogs.
+
+Research results and blogs are stored as rows with indexes on keyword,
+creation time and URL, so past runs can be listed page by page and looked up
+by ID without scanning static/results or static/blogs.
+
+Usage (one-shot import of existing JSON files):
+    python storage.py import [--results-dir static/results] [--blogs-dir static/blogs]
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from shared import Lazy, connect_sqlite, init_sqlite
+
+load_dotenv()
+
+# --- Config ---
+STORAGE_PATH = os.getenv("STORAGE_PATH", "data/seo_blog.db")
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"  # format of the timestamps in artifact files
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS research_runs (
+    id TEXT PRIMARY KEY,
+    keyword TEXT NOT NULL,
+    search_type TEXT,
+    num_results INTEGER,
+    result_count INTEGER NOT NULL,
+    filename TEXT UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_research_runs_keyword ON research_runs (keyword, created_at);
+CREATE INDEX IF NOT EXISTS idx_research_runs_created_at ON research_runs (created_at);
+
+CREATE TABLE IF NOT EXISTS research_results (
+    run_id TEXT NOT NULL REFERENCES research_runs (id) ON DELETE CASCADE,
+    rank INTEGER NOT NULL,
+    keyword TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    status TEXT,
+    PRIMARY KEY (run_id, rank)
+);
+CREATE INDEX IF NOT EXISTS idx_research_results_url ON research_results (url);
+CREATE INDEX IF NOT EXISTS idx_research_results_keyword ON research_results (keyword);
+
+CREATE TABLE IF NOT EXISTS blogs (
+    id TEXT PRIMARY KEY,
+    keyword TEXT NOT NULL,
+    source_url TEXT,
+    source_result TEXT NOT NULL,
+    blog_content TEXT NOT NULL,
+    seo_data TEXT,
+    generated_at TEXT,
+    filename TEXT UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blogs_keyword ON blogs (keyword, created_at);
+CREATE INDEX IF NOT EXISTS idx_blogs_created_at ON blogs (created_at);
+CREATE INDEX IF NOT EXISTS idx_blogs_source_url ON blogs (source_url);
+"""
+
+
+def parse_timestamp(timestamp: Optional[str], default: float) -> float:
+    """Epoch seconds for an artifact timestamp string, or `default` if it does not parse."""
+    try:
+        return datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+def clamp_page(page: Any, per_page: Any) -> Tuple[int, int]:
+    """Sanitise page/per_page query values."""
+    try:
+        page = max(1, int(page))
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        per_page = min(MAX_PAGE_SIZE, max(1, int(per_page)))
+    except (TypeError, ValueError):
+        per_page = DEFAULT_PAGE_SIZE
+    return page, per_page
+
+
+class Storage:
+    """SQLite store for research runs (with their ranked results) and generated blogs."""
+
+    def __init__(self, path: str = STORAGE_PATH):
+        self.path = path
+
+        init_sqlite(path, self._connect, SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect_sqlite(self.path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    # --- Research runs ---
+    def save_research_run(self, keyword: str, results: List[Dict[str, Any]], search_type: Optional[str] = None,
+                          num_results: Optional[int] = None, filename: Optional[str] = None,
+                          run_id: Optional[str] = None, created_at: Optional[float] = None) -> str:
+        """Store one research run and its results. Returns the run ID."""
+        run_id = run_id or uuid.uuid4().hex
+        with closing(self._connect()) as conn, conn:
+            if filename:
+                # A rewritten artifact file replaces its earlier run
+                conn.execute("DELETE FROM research_runs WHERE filename = ?", (filename,))
+            conn.execute(
+                """INSERT INTO research_runs (id, keyword, search_type, num_results, result_count, filename, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (run_id, keyword, search_type, num_results, len(results), filename, created_at or time.time()),
+            )
+            conn.executemany(
+                """INSERT OR REPLACE INTO research_results (run_id, rank, keyword, url, title, description, status)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (run_id, result.get('rank', rank), result.get('keyword', keyword), result.get('url', ''),
+                     result.get('title'), result.get('description'), result.get('status'))
+                    for rank, result in enumerate(results, 1)
+                ],
+            )
+        return run_id
+
+    def get_research_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """A research run with its results in rank order, or None."""
+        with closing(self._connect()) as conn:
+            run = conn.execute("SELECT * FROM research_runs WHERE id = ?", (run_id,)).fetchone()
+            if run is None:
+                return None
+            rows = conn.execute(
+                """SELECT keyword, rank, url, title, description, status FROM research_results
+                   WHERE run_id = ? ORDER BY rank""",
+                (run_id,),
+            ).fetchall()
+        data = dict(run)
+        data['results'] = [dict(row) for row in rows]
+        return data
+
+    def list_research_runs(self, page: int = 1, per_page: int = DEFAULT_PAGE_SIZE,
+                           keyword: Optional[str] = None) -> Dict[str, Any]:
+        """Newest-first page of research runs (without their results)."""
+        where, params = ("WHERE keyword = ?", [keyword]) if keyword else ("", [])
+        return self._page("research_runs", "*", where, params, page, per_page)
+
+    def find_results_by_url(self, url: str, limit: int = MAX_PAGE_SIZE) -> List[Dict[str, Any]]:
+        """Every stored ranking of a URL, newest run first."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """SELECT r.run_id, r.keyword, r.rank, r.url, r.title, r.description, r.status, runs.created_at
+                   FROM research_results r JOIN research_runs runs ON runs.id = r.run_id
+                   WHERE r.url = ? ORDER BY runs.created_at DESC LIMIT ?""",
+                (url, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # --- Blogs ---
+    def save_blog(self, source_result: Dict[str, Any], blog_content: str, seo_data: Optional[str] = None,
+                  generated_at: Optional[str] = None, filename: Optional[str] = None,
+                  blog_id: Optional[str] = None, created_at: Optional[float] = None) -> str:
+        """Store one generated blog. Returns the blog ID."""
+        blog_id = blog_id or uuid.uuid4().hex
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO blogs (id, keyword, source_url, source_result, blog_content, seo_data,
+                                      generated_at, filename, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (blog_id, source_result.get('keyword', ''), source_result.get('url'),
+                 json.dumps(source_result, ensure_ascii=False), blog_content, seo_data,
+                 generated_at, filename, created_at or time.time()),
+            )
+        return blog_id
+
+    def get_blog(self, blog_id: str) -> Optional[Dict[str, Any]]:
+        return self._get_blog("id", blog_id)
+
+    def get_blog_by_filename(self, filename: str) -> Optional[Dict[str, Any]]:
+        return self._get_blog("filename", filename)
+
+    def get_blog_version(self, filename: str) -> Optional[Tuple[str, float]]:
+        """(id, created_at) of the blog stored under `filename`; changes whenever it is replaced."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT id, created_at FROM blogs WHERE filename = ?", (filename,)).fetchone()
+        return (row['id'], row['created_at']) if row is not None else None
+
+    def _get_blog(self, column: str, value: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT * FROM blogs WHERE {column} = ?", (value,)).fetchone()
+        if row is None:
+            return None
+        blog = dict(row)
+        blog['source_result'] = json.loads(blog['source_result'])
+        return blog
+
+    def list_blogs(self, page: int = 1, per_page: int = DEFAULT_PAGE_SIZE,
+                   keyword: Optional[str] = None, source_url: Optional[str] = None) -> Dict[str, Any]:
+        """Newest-first page of blogs (without their content)."""
+        clauses, params = [], []
+        if keyword:
+            clauses.append("keyword = ?")
+            params.append(keyword)
+        if source_url:
+            clauses.append("source_url = ?")
+            params.append(source_url)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._page("blogs", "id, keyword, source_url, generated_at, filename, created_at",
+                          where, params, page, per_page)
+
+    def _page(self, table: str, columns: str, where: str, params: List[Any],
+              page: int, per_page: int) -> Dict[str, Any]:
+        page, per_page = clamp_page(page, per_page)
+        with closing(self._connect()) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {columns} FROM {table} {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page],
+            ).fetchall()
+        return {
+            'items': [dict(row) for row in rows],
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page,
+        }
+
+    # --- Import ---
+    def has_filename(self, table: str, filename: str) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT 1 FROM {table} WHERE filename = ?", (filename,)).fetchone() is not None
+
+    def import_json_files(self, results_dir: str = "static/results", blogs_dir: str = "static/blogs") -> Dict[str, int]:
+        """
+        Load existing results_*.json and blog_*.json artifacts. Files that were
+        already imported (by filename) are skipped, so this can be re-run.
+        """
+        counts = {'research_runs': 0, 'blogs': 0, 'skipped': 0, 'errors': 0}
+
+        for path in sorted(glob.glob(os.path.join(results_dir, "results_*.json"))):
+            filename = os.path.basename(path)
+            if self.has_filename("research_runs", filename):
+                counts['skipped'] += 1
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self.save_research_run(
+                    data.get('keyword', ''), data.get('results', []), filename=filename,
+                    created_at=parse_timestamp(data.get('timestamp'), os.path.getmtime(path)),
+                )
+                counts['research_runs'] += 1
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"✗ Could not import {path}: {e}")
+                counts['errors'] += 1
+
+        for path in sorted(glob.glob(os.path.join(blogs_dir, "blog_*.json"))):
+            filename = os.path.basename(path)
+            if self.has_filename("blogs", filename):
+                counts['skipped'] += 1
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self.save_blog(
+                    data.get('source_result') or {}, data.get('blog_content', ''), data.get('seo_data'),
+                    generated_at=data.get('generated_at'), filename=filename,
+                    created_at=parse_timestamp(data.get('generated_at'), os.path.getmtime(path)),
+                )
+                counts['blogs'] += 1
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"✗ Could not import {path}: {e}")
+                counts['errors'] += 1
+
+        return counts
+
+
+# --- Shared instance ---
+_storage = Lazy(Storage)
+
+def get_storage() -> Storage:
+    """Return the process-wide storage, creating it on first use."""
+    return _storage.get()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    importer = subcommands.add_parser("import", help="import existing JSON result and blog files")
+    importer.add_argument("--results-dir", default="static/results")
+    importer.add_argument("--blogs-dir", default="static/blogs")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        counts = get_storage().import_json_files(args.results_dir, args.blogs_dir)
+        print(f"✓ Imported {counts['research_runs']} research runs and {counts['blogs']} blogs "
+              f"({counts['skipped']} already imported, {counts['errors']} errors) into {STORAGE_PATH}")
+
+if __name__ == "__main__":
+    main()